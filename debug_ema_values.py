@@ -13,7 +13,8 @@ def debug_ema_values():
     test_data = {
         'symbols': ['BTCUSDT'],
         'page': 1,
-        'page_size': 5
+        'page_size': 5,
+        'debug': True  # 需要逐币种的原始分析结果
     }
     
     print("调试EMA值和价格距离...")
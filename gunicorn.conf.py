@@ -11,8 +11,18 @@ import os
 # 服务器配置
 bind = "0.0.0.0:5000"
 workers = multiprocessing.cpu_count() * 2 + 1  # 推荐的工作进程数
-worker_class = "sync"
-worker_connections = 1000
+# 默认使用gthread线程工作进程：并发请求的I/O等待相互重叠，K线批量获取、策略批量分析等
+# ThreadPoolExecutor中的pandas/numba计算仍运行在真实线程上。
+# 可通过 GUNICORN_WORKER_CLASS 环境变量覆盖（如 sync）；gevent需显式开启，
+# monkey.patch_all 会把这些线程池变成单线程上的协程，CPU密集的计算会串行并阻塞其他请求
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+worker_connections = 1000  # gevent：每个工作进程的最大并发连接数
+threads = 8  # gthread：每个工作进程的线程数
+
+if worker_class == 'gevent':
+    # preload_app 会在master进程中导入应用，必须在应用导入requests之前打补丁
+    from gevent import monkey
+    monkey.patch_all()
 timeout = 120  # 请求超时时间（秒）
 keepalive = 2
 max_requests = 1000  # 每个工作进程处理的最大请求数
@@ -0,0 +1,85 @@
+"""
+基于NumPy数组的指标计算（EMA、EMA最新值、简单移动平均）
+
+安装numba时使用 @njit 编译的递推内核，未安装或数据含NaN时回退到pandas，
+结果与 ewm(adjust=False) / rolling().mean() 一致。输入输出均为ndarray。
+"""
+
+import numpy as np
+import pandas as pd
+
+# 可选导入numba，如果没有安装则使用pandas计算
+try:
+    from numba import njit, types
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    njit = None
+    types = None
+
+
+if NUMBA_AVAILABLE:
+    # 显式签名让内核在导入时编译（配合cache=True），首个请求不再承担JIT编译耗时；
+    # 收盘价只声明只读'A'布局一个签名，可写、只读视图与非连续数组都能匹配
+    _F8_1D = types.float64[:]
+    _F8_1D_RO = types.Array(types.float64, 1, 'A', readonly=True)
+
+    @njit(types.void(_F8_1D_RO, types.float64, _F8_1D), cache=True, fastmath=True)
+    def _ema_kernel(close, alpha, out):
+        """EMA递推（等价于 ewm(adjust=False)），直接写入预分配的输出数组"""
+        out[0] = close[0]
+        for i in range(1, close.shape[0]):
+            out[i] = alpha * close[i] + (1.0 - alpha) * out[i - 1]
+
+    @njit(types.float64(_F8_1D_RO, types.float64), cache=True, fastmath=True)
+    def _ema_last_kernel(close, alpha):
+        """与 _ema_kernel 相同的递推，只保留一个累加器，返回最后一个值"""
+        value = close[0]
+        for i in range(1, close.shape[0]):
+            value = alpha * close[i] + (1.0 - alpha) * value
+        return value
+
+    @njit(types.void(_F8_1D_RO, types.int64, _F8_1D), cache=True)
+    def _sma_kernel(close, window, out):
+        """滑动窗口维护和，O(N)计算简单移动平均；不足一个窗口的位置为NaN"""
+        s = 0.0
+        for i in range(close.shape[0]):
+            s += close[i]
+            if i >= window:
+                s -= close[i - window]
+            out[i] = s / window if i >= window - 1 else np.nan
+
+
+def _use_kernel(close: np.ndarray) -> bool:
+    # numba内核不处理NaN（EMA的衰减权重、滑动和都会被NaN污染），含NaN时交给pandas
+    return NUMBA_AVAILABLE and len(close) > 0 and not np.isnan(close).any()
+
+
+def ema(close, period: int) -> np.ndarray:
+    """EMA序列，等价于 Series.ewm(span=period, adjust=False).mean()"""
+    close = np.asarray(close, dtype=np.float64)
+    if _use_kernel(close):
+        out = np.empty_like(close)
+        _ema_kernel(close, 2.0 / (period + 1), out)
+        return out
+    return pd.Series(close).ewm(span=period, adjust=False).mean().to_numpy()
+
+
+def ema_last(close, period: int) -> float:
+    """EMA最新值，等价于 ema(close, period)[-1]，不分配整条序列；空数组返回NaN"""
+    close = np.asarray(close, dtype=np.float64)
+    if len(close) == 0:
+        return float('nan')
+    if _use_kernel(close):
+        return float(_ema_last_kernel(close, 2.0 / (period + 1)))
+    return float(ema(close, period)[-1])
+
+
+def sma(close, window: int) -> np.ndarray:
+    """简单移动平均序列，等价于 Series.rolling(window).mean()"""
+    close = np.asarray(close, dtype=np.float64)
+    if _use_kernel(close):
+        out = np.empty_like(close)
+        _sma_kernel(close, int(window), out)
+        return out
+    return pd.Series(close).rolling(window=window).mean().to_numpy()
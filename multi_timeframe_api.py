@@ -1,8 +1,22 @@
 from flask import Blueprint, request, jsonify
+import bisect
+import hashlib
+import heapq
 import logging
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import threading
 import time
-from typing import List, Dict, Any
+from operator import itemgetter
+from typing import List, Dict, Any, Optional
+
+# 可选导入orjson，未安装时回退到标准库json
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
 # Assuming the first file is named 'multi_timeframe_strategy.py'
 from multi_timeframe_strategy import MultiTimeframeStrategy
@@ -25,6 +39,33 @@ except Exception as e:
     original_strategy = None
     modified_strategy = None
 
+# --- Symbol filtering constants (built once at import) ---
+USDT_PAIR_SUFFIX = '_USDT'
+# 过滤稳定币 - 扩展列表
+STABLECOIN_BASES = frozenset({
+    'USDC', 'BUSD', 'TUSD', 'USDP', 'DAI', 'FDUSD', 'USDT', 'USDD', 'FRAX', 'LUSD',
+    'GUSD', 'SUSD', 'USDN', 'USTC', 'UST', 'CUSD', 'DUSD', 'VAI', 'RSV', 'USDX',
+    'USDJ', 'USDS'
+})
+# 过滤杠杆代币 (3L, 3S, 5L, 5S)
+LEVERAGE_TOKEN_SUFFIXES = ('3L', '3S', '5L', '5S')
+# 过滤其他不需要的代币类型
+EXCLUDED_BASE_PATTERNS = ('BULL', 'BEAR', 'UP', 'DOWN', 'LONG', 'SHORT')
+
+# 24h成交量排名变化缓慢：上游结果缓存60秒，并发的前端轮询共享同一次请求
+TOP_SYMBOLS_TTL = 60
+TOP_SYMBOLS_LIMIT = 500
+_top_symbols_cache = {'ts': 0.0, 'symbols': None, 'etag': None}
+_top_symbols_lock = threading.Lock()
+
+# 复用同一个会话（连接池 + keep-alive），避免每次请求Gate.io都重新进行TCP/TLS握手
+_http = requests.Session()
+_http.mount('https://', HTTPAdapter(
+    pool_connections=20,
+    pool_maxsize=50,
+    max_retries=Retry(total=2, backoff_factor=0.2)
+))
+
 # --- Helper Function for Code Reusability ---
 def _process_symbol(symbol: str) -> str:
     """
@@ -37,6 +78,55 @@ def _process_symbol(symbol: str) -> str:
         processed += 'USDT'
     return processed
 
+def _signal_key(signal: Dict[str, Any]) -> tuple:
+    """
+    Strictest identifier of a formatted signal. Used both for API-level deduplication
+    and as the keyset (cursor) pagination key, so surviving signals never share a key.
+    """
+    # 处理None值，确保去重键的一致性
+    take_profit_price = signal.get('take_profit_price')
+    if take_profit_price is None:
+        take_profit_price = 0
+    return (
+        signal.get('symbol', ''),  # 币种
+        signal.get('timeframe', ''),  # 时间框架
+        signal.get('signal_type', ''),  # 信号类型
+        round(signal.get('entry_price', 0), 6),  # 入场价格
+        round(take_profit_price, 6),  # 止盈价格
+        round(signal.get('level', 0), 6),  # 水平位
+        signal.get('type', ''),  # 信号子类型
+        round(signal.get('distance', 0), 8),  # 距离
+        round(signal.get('profit_pct', 0), 4)  # 收益率
+    )
+
+# 游标各分量的类型，与 _signal_key 的字段一一对应
+_SIGNAL_KEY_TYPES = (str, str, str, float, float, float, str, float, float)
+
+def _parse_signal_cursor(cursor: Any) -> Optional[tuple]:
+    """
+    Validates a client-supplied cursor (a list shaped like _signal_key).
+    Returns it as a tuple, or None when it is malformed.
+    """
+    if not isinstance(cursor, list) or len(cursor) != len(_SIGNAL_KEY_TYPES):
+        return None
+    for value, expected in zip(cursor, _SIGNAL_KEY_TYPES):
+        if expected is float:
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                return None
+        elif not isinstance(value, expected):
+            return None
+    return tuple(cursor)
+
+def _nan_to_none_list(values) -> list:
+    """
+    Converts a numeric array/Series to a JSON-ready list in one pass, with NaN as None.
+    """
+    arr = np.asarray(values, dtype=np.float64)
+    out = arr.tolist()
+    for i in np.flatnonzero(np.isnan(arr)).tolist():
+        out[i] = None
+    return out
+
 # --- API Endpoints ---
 
 @multi_timeframe_bp.route('/analyze_symbol', methods=['POST'])
@@ -109,6 +199,16 @@ def analyze_multiple_symbols():
         # 分页参数 - 现在按信号数量分页
         page = data.get('page', 1)
         signals_per_page = data.get('page_size', 20)  # 每页信号数量
+        # 游标分页：请求体包含 cursor 键（首页为 null）时，按复合键顺序返回 cursor 之后的信号
+        use_cursor = 'cursor' in data
+        cursor = data.get('cursor')
+        cursor_key = None
+        if cursor is not None:
+            cursor_key = _parse_signal_cursor(cursor)
+            if cursor_key is None:
+                return jsonify({'error': 'Invalid "cursor". Pass back the "next_cursor" value from the previous page.'}), 400
+        # 逐币种的原始分析结果体积很大（与signals内容重复），仅在请求体 debug 为真时返回
+        debug = bool(data.get('debug', False))
         
         # 【优化】动态调整批量大小以避免超时
         max_symbols = 50  # 降低单次请求的最大币种数量
@@ -155,7 +255,7 @@ def analyze_multiple_symbols():
         # 检查分析结果是否为空
         if not all_results:
             logger.warning("No results returned from strategy analysis")
-            return jsonify({
+            empty_payload = {
                 'success': True,
                 'symbols_requested': len(processed_symbols),
                 'symbols_processed': 0,
@@ -171,9 +271,11 @@ def analyze_multiple_symbols():
                     'has_next': False,
                     'has_prev': False
                 },
-                'results': {},
                 'signals': []
-            })
+            }
+            if debug:
+                empty_payload['results'] = {}
+            return jsonify(empty_payload)
         
         # 【已优化】使用更清晰的变量名进行统计
         total_analyses = 0
@@ -224,22 +326,7 @@ def analyze_multiple_symbols():
         
         for signal in all_signals:
             # 创建最严格的唯一标识符，包含所有关键字段
-            # 处理None值，确保去重键的一致性
-            take_profit_price = signal.get('take_profit_price')
-            if take_profit_price is None:
-                take_profit_price = 0
-            
-            signal_key = (
-                signal.get('symbol', ''),  # 币种
-                signal.get('timeframe', ''),  # 时间框架
-                signal.get('signal_type', ''),  # 信号类型
-                round(signal.get('entry_price', 0), 6),  # 入场价格
-                round(take_profit_price, 6),  # 止盈价格
-                round(signal.get('level', 0), 6),  # 水平位
-                signal.get('type', ''),  # 信号子类型
-                round(signal.get('distance', 0), 8),  # 距离
-                round(signal.get('profit_pct', 0), 4)  # 收益率
-            )
+            signal_key = _signal_key(signal)
             
             if signal_key not in seen_signals:
                 seen_signals.add(signal_key)
@@ -254,12 +341,41 @@ def analyze_multiple_symbols():
         total_signals = len(all_signals)
         total_pages = (total_signals + signals_per_page - 1) // signals_per_page if total_signals > 0 else 0
         
-        # 计算当前页的信号范围
-        start_idx = (page - 1) * signals_per_page
-        end_idx = start_idx + signals_per_page
-        page_signals = all_signals[start_idx:end_idx]
+        if use_cursor:
+            # 按去重键排序后二分定位游标，无需按页码跳过前面的信号；
+            # 去重后各信号的键互不相同，游标之后的信号不会因并列而被跳过
+            all_signals.sort(key=_signal_key)
+            start_idx = 0
+            if cursor_key is not None:
+                keys = [_signal_key(s) for s in all_signals]
+                start_idx = bisect.bisect_right(keys, cursor_key)
+            end_idx = start_idx + signals_per_page
+            page_signals = all_signals[start_idx:end_idx]
+            has_next = end_idx < total_signals
+            pagination = {
+                'cursor': cursor,
+                'next_cursor': list(_signal_key(page_signals[-1])) if has_next and page_signals else None,
+                'signals_per_page': signals_per_page,
+                'total_pages': total_pages,
+                'total_signals': total_signals,
+                'has_next': has_next,
+                'has_prev': start_idx > 0
+            }
+        else:
+            # 计算当前页的信号范围
+            start_idx = (page - 1) * signals_per_page
+            end_idx = start_idx + signals_per_page
+            page_signals = all_signals[start_idx:end_idx]
+            pagination = {
+                'current_page': page,
+                'signals_per_page': signals_per_page,
+                'total_pages': total_pages,
+                'total_signals': total_signals,
+                'has_next': page < total_pages,
+                'has_prev': page > 1
+            }
         
-        return jsonify({
+        payload = {
             'success': True,
             'symbols_requested': len(processed_symbols),
             'symbols_processed': len(all_results),
@@ -267,22 +383,78 @@ def analyze_multiple_symbols():
             'successful_timeframe_analyses': successful_analyses,
             'total_signals': total_signals,
             'signals_shown': len(page_signals),
-            'pagination': {
-                'current_page': page,
-                'signals_per_page': signals_per_page,
-                'total_pages': total_pages,
-                'total_signals': total_signals,
-                'has_next': page < total_pages,
-                'has_prev': page > 1
-            },
-            'results': all_results,
+            'pagination': pagination,
             'signals': page_signals  # 只返回当前页的信号
-        })
+        }
+        if debug:
+            payload['results'] = all_results
+        return jsonify(payload)
         
     except Exception as e:
         logger.error(f"Error analyzing multiple symbols: {e}", exc_info=True)
         return jsonify({'error': 'An internal server error occurred.', 'details': str(e)}), 500
 
+def _fetch_top_symbols() -> List[str]:
+    """
+    Fetches Gate.io spot tickers and returns the top 500 USDT symbols by 24h quote volume.
+    """
+    # 使用Gate.io API获取24小时交易数据
+    url = 'https://api.gateio.ws/api/v4/spot/tickers'
+    response = _http.get(url, timeout=15, headers={'Accept-Encoding': 'gzip'})
+    response.raise_for_status()
+    data = json_loads(response.content)
+    
+    if not data:
+        raise ValueError("Gate.io API returned empty data.")
+    
+    # Gate.io数据格式: [{"currency_pair": "BTC_USDT", "last": "50000", "lowest_ask": "50001", "highest_bid": "49999", "change_percentage": "2.5", "base_volume": "1000", "quote_volume": "50000000", "high_24h": "51000", "low_24h": "49000"}]
+    
+    # 按quote_volume排序，过滤USDT交易对
+    usdt_pairs = []
+    suffix_len = len(USDT_PAIR_SUFFIX)
+    for item in data:
+        currency_pair = item.get('currency_pair', '')
+        if not currency_pair.endswith(USDT_PAIR_SUFFIX):
+            continue
+        # 转换格式: BTC_USDT -> BTCUSDT
+        base_asset = currency_pair[:-suffix_len]
+        
+        # 先做开销最小的判断：名称长度、稳定币、杠杆代币、其他排除类型
+        if (len(base_asset) > 15 or  # 放宽代币名称长度限制
+                base_asset in STABLECOIN_BASES or
+                base_asset.endswith(LEVERAGE_TOKEN_SUFFIXES) or
+                any(pattern in base_asset for pattern in EXCLUDED_BASE_PATTERNS)):
+            continue
+        
+        quote_volume = float(item.get('quote_volume', 0))
+        if quote_volume > 0:  # 确保有交易量
+            usdt_pairs.append({
+                'symbol': f"{base_asset}USDT",
+                'quote_volume': quote_volume,
+                'currency_pair': currency_pair
+            })
+    
+    # 按交易量取前500个（堆选择，只维护500个候选，不对全部交易对排序）
+    top_pairs = heapq.nlargest(TOP_SYMBOLS_LIMIT, usdt_pairs, key=itemgetter('quote_volume'))
+    return [pair['symbol'] for pair in top_pairs]
+
+
+def _cached_top_symbols():
+    """
+    Returns (symbols, etag), refreshing from Gate.io at most once per TOP_SYMBOLS_TTL seconds.
+    """
+    with _top_symbols_lock:
+        if _top_symbols_cache['symbols'] is None or time.time() - _top_symbols_cache['ts'] >= TOP_SYMBOLS_TTL:
+            symbols = _fetch_top_symbols()
+            _top_symbols_cache.update(
+                ts=time.time(),
+                symbols=symbols,
+                etag=hashlib.md5('\n'.join(symbols).encode('utf-8')).hexdigest()
+            )
+            logger.info(f"Successfully fetched and filtered {len(symbols)} symbols from Gate.io.")
+        return _top_symbols_cache['symbols'], _top_symbols_cache['etag']
+
+
 @multi_timeframe_bp.route('/get_top_symbols', methods=['GET'])
 def get_top_symbols():
     """Gets the top 500 symbols by 24h volume from Gate.io, excluding stablecoins."""
@@ -292,68 +464,17 @@ def get_top_symbols():
     ]
     
     try:
-        # 使用Gate.io API获取24小时交易数据
-        url = 'https://api.gateio.ws/api/v4/spot/tickers'
-        response = requests.get(url, timeout=15)
-        response.raise_for_status()
-        data = response.json()
-        
-        if not data:
-            raise ValueError("Gate.io API returned empty data.")
-        
-        # Gate.io数据格式: [{"currency_pair": "BTC_USDT", "last": "50000", "lowest_ask": "50001", "highest_bid": "49999", "change_percentage": "2.5", "base_volume": "1000", "quote_volume": "50000000", "high_24h": "51000", "low_24h": "49000"}]
-        
-        # 按quote_volume排序，过滤USDT交易对
-        usdt_pairs = []
-        for item in data:
-            currency_pair = item.get('currency_pair', '')
-            if currency_pair.endswith('_USDT'):
-                # 转换格式: BTC_USDT -> BTCUSDT
-                base_asset = currency_pair.replace('_USDT', '')
-                symbol = f"{base_asset}USDT"
-                
-                # 过滤稳定币 - 扩展列表
-                stablecoin_bases = {
-                    'USDC', 'BUSD', 'TUSD', 'USDP', 'DAI', 'FDUSD', 'USDT', 'USDD', 'FRAX', 'LUSD',
-                    'GUSD', 'SUSD', 'USDN', 'USTC', 'UST', 'CUSD', 'DUSD', 'VAI', 'RSV', 'USDX',
-                    'USDJ', 'USDS', 'USDT', 'USDC', 'BUSD', 'TUSD', 'USDP', 'DAI', 'FDUSD'
-                }
-                
-                # 过滤杠杆代币 (3L, 3S, 5L, 5S)
-                leverage_tokens = ['3L', '3S', '5L', '5S']
-                is_leverage_token = any(base_asset.endswith(token) for token in leverage_tokens)
-                
-                # 过滤其他不需要的代币类型
-                excluded_patterns = ['BULL', 'BEAR', 'UP', 'DOWN', 'LONG', 'SHORT']
-                is_excluded = any(pattern in base_asset for pattern in excluded_patterns)
-                
-                # 先获取交易量
-                quote_volume = float(item.get('quote_volume', 0))
-                
-                if (base_asset not in stablecoin_bases and 
-                    not is_leverage_token and 
-                    not is_excluded and
-                    len(base_asset) <= 15 and  # 放宽代币名称长度限制
-                    quote_volume > 0):  # 确保有交易量
-                    usdt_pairs.append({
-                        'symbol': symbol,
-                        'quote_volume': quote_volume,
-                        'currency_pair': currency_pair
-                    })
-        
-        # 按交易量降序排序
-        sorted_pairs = sorted(usdt_pairs, key=lambda x: x['quote_volume'], reverse=True)
-        
-        # 取前500个
-        filtered_symbols = [pair['symbol'] for pair in sorted_pairs[:500]]
-        
-        logger.info(f"Successfully fetched and filtered {len(filtered_symbols)} symbols from Gate.io.")
-        return jsonify({
+        filtered_symbols, etag = _cached_top_symbols()
+        response = jsonify({
             'success': True,
             'source': 'Gate.io API',
             'count': len(filtered_symbols),
             'symbols': filtered_symbols
         })
+        # 客户端携带相同ETag时直接返回304，不再重复传输列表
+        response.set_etag(etag)
+        response.cache_control.max_age = TOP_SYMBOLS_TTL
+        return response.make_conditional(request)
 
     except requests.exceptions.RequestException as e:
         logger.error(f"Failed to fetch symbols from Gate.io API: {e}. Using default list.")
@@ -499,8 +620,8 @@ def get_chart_data():
 
         # Build response payload
         # Convert timestamps to epoch milliseconds for frontend time scale
-        ts_ms = [int(ts.value // 10**6) for ts in df.index.to_series()]  # pandas datetime64[ns] -> ms
-        prices = [float(x) if x == x else None for x in df['close'].tolist()]
+        ts_ms = df.index.values.astype('datetime64[ms]').astype(np.int64).tolist()
+        prices = _nan_to_none_list(df['close'])
 
         payload = {
             'success': True,
@@ -511,10 +632,10 @@ def get_chart_data():
                 'prices': prices,
             },
             'ema': {
-                'ema89': [float(x) if x == x else None for x in df.get('ema89', []).tolist()],
-                'ema144': [float(x) if x == x else None for x in df.get('ema144', []).tolist()],
-                'ema233': [float(x) if x == x else None for x in df.get('ema233', []).tolist()],
-                'ema377': [float(x) if x == x else None for x in df.get('ema377', []).tolist()],
+                'ema89': _nan_to_none_list(df.get('ema89', [])),
+                'ema144': _nan_to_none_list(df.get('ema144', [])),
+                'ema233': _nan_to_none_list(df.get('ema233', [])),
+                'ema377': _nan_to_none_list(df.get('ema377', [])),
             }
         }
 
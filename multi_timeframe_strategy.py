@@ -2,17 +2,143 @@ import pandas as pd
 import numpy as np
 import requests
 import logging
+import os
 import time
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Tuple, Optional
 
+# 可选导入numba，如果没有安装则使用pandas计算EMA和布林带
+try:
+    from numba import njit, types
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    njit = None
+    types = None
+
+# 可选导入pyarrow，安装后K线磁盘缓存使用parquet格式，否则回退到pickle
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# K线磁盘缓存的默认目录（测试脚本启用磁盘缓存时使用）
+KLINES_DISK_CACHE_DIR = os.path.join('cache', 'klines')
+
 # --- 日志配置 (建议放在文件开头) ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 
+if NUMBA_AVAILABLE:
+    # 显式签名让内核在导入时编译（配合cache=True，之后的运行直接加载磁盘缓存），
+    # 首次调用不再承担JIT编译耗时。每个内核只声明一个签名：收盘价按只读'A'布局声明，
+    # 可写、只读视图与非连续数组都能匹配（同时声明可写版本会导致调用时 Ambiguous overloading）
+    _F8_1D = types.float64[:]
+    _F8_1D_RO = types.Array(types.float64, 1, 'A', readonly=True)
+    _F8_2D = types.float64[:, :]
+
+    @njit(types.void(_F8_1D_RO, _F8_1D, _F8_2D), cache=True, fastmath=True)
+    def _ema_multi(close, alphas, out):
+        """一次遍历收盘价，同时递推多个周期的EMA（等价于 ewm(adjust=False)）"""
+        n_periods = alphas.shape[0]
+        # 各周期的递推状态放在长度为M的局部向量中，内层循环只读写寄存器/L1，
+        # 不再回读上一行输出；衰减系数(1-alpha)预先算好
+        betas = 1.0 - alphas
+        state = np.empty(n_periods, dtype=np.float64)
+        for j in range(n_periods):
+            state[j] = close[0]
+            out[0, j] = close[0]
+        for i in range(1, close.shape[0]):
+            x = close[i]
+            for j in range(n_periods):
+                state[j] = alphas[j] * x + betas[j] * state[j]
+                out[i, j] = state[j]
+
+    @njit(types.void(_F8_1D_RO, types.int64, types.float64, _F8_1D, _F8_1D, _F8_1D, _F8_1D),
+          cache=True)
+    def _bbands(close, n, k, mid, std_out, upper, lower):
+        """滑动窗口维护和与平方和，O(N)计算布林带（样本标准差，与 rolling().std() 一致）"""
+        # 以首个价格为基准平移，减小平方和相减时的精度损失
+        shift = close[0]
+        s = 0.0
+        s2 = 0.0
+        for i in range(close.shape[0]):
+            x = close[i] - shift
+            s += x
+            s2 += x * x
+            if i >= n:
+                y = close[i - n] - shift
+                s -= y
+                s2 -= y * y
+            if i < n - 1:
+                mid[i] = np.nan
+                std_out[i] = np.nan
+                upper[i] = np.nan
+                lower[i] = np.nan
+                continue
+            mean = s / n
+            var = (s2 - s * mean) / (n - 1)
+            sd = np.sqrt(var) if var > 0.0 else 0.0
+            mid[i] = mean + shift
+            std_out[i] = sd
+            upper[i] = mid[i] + sd * k
+            lower[i] = mid[i] - sd * k
+
+
+# 判断趋势使用的EMA列（按周期从短到长）
+TREND_EMA_COLUMNS = ('ema89', 'ema144', 'ema233')
+
+# 强趋势要求EMA89与EMA144拉开的幅度
+TREND_STRENGTH_SPREAD = 0.01
+
+
+def _trend_decision(fast: int, slow: int, spread: int) -> Tuple[str, str]:
+    if fast == slow == 1:
+        return 'bullish', 'strong' if spread == 1 else 'weak'
+    if fast == slow == -1:
+        return 'bearish', 'strong' if spread == -1 else 'weak'
+    return 'neutral', 'weak'
+
+
+# 趋势判定查找表：(EMA89对EMA144, EMA144对EMA233, EMA89偏离EMA144超过阈值的方向) -> (趋势, 强度)
+# 各分量取 1 / 0 / -1，模块加载时一次生成，逐币种判定只需一次字典查找
+TREND_TABLE = {
+    (fast, slow, spread): _trend_decision(fast, slow, spread)
+    for fast in (-1, 0, 1) for slow in (-1, 0, 1) for spread in (-1, 0, 1)
+}
+
+# 两种策略的时间框架与止盈配置（模块级常量，无需实例化策略即可读取）
+STRATEGY_CONFIGS = {
+    # 原策略：包含4H，不同时间框架对应不同止盈
+    'original': {
+        'timeframes': ['4h', '8h', '12h', '1d', '3d', '1w'],
+        'take_profit_timeframes': {
+            '4h': '5m',   # 4小时 -> 5分钟布林中轨
+            '8h': '15m',  # 8小时 -> 15分钟布林中轨  
+            '12h': '30m', # 12小时 -> 30分钟布林中轨
+            '1d': '1h',   # 1天 -> 1小时布林中轨
+            '3d': '4h',   # 3天 -> 4小时布林中轨
+            '1w': '1d'    # 1周 -> 1天布林中轨
+        }
+    },
+    # 修改策略：去掉4H，所有止盈改为3分钟布林中轨
+    'modified': {
+        'timeframes': ['8h', '12h', '1d', '3d', '1w'],
+        'take_profit_timeframes': {
+            '8h': '3m',   # 8小时 -> 3分钟布林中轨
+            '12h': '3m',  # 12小时 -> 3分钟布林中轨
+            '1d': '3m',   # 1天 -> 3分钟布林中轨
+            '3d': '3m',   # 3天 -> 3分钟布林中轨
+            '1w': '3m'    # 1周 -> 3分钟布林中轨
+        }
+    }
+}
+
+
 class MultiTimeframeStrategy:
     def __init__(self, strategy_type='original'):
         """
@@ -21,27 +147,10 @@ class MultiTimeframeStrategy:
         """
         self.strategy_type = strategy_type
         
-        if strategy_type == 'original':
-            # 原策略：包含4H，不同时间框架对应不同止盈
-            self.timeframes = ['4h', '8h', '12h', '1d', '3d', '1w']
-            self.take_profit_timeframes = {
-                '4h': '5m',   # 4小时 -> 5分钟布林中轨
-                '8h': '15m',  # 8小时 -> 15分钟布林中轨  
-                '12h': '30m', # 12小时 -> 30分钟布林中轨
-                '1d': '1h',   # 1天 -> 1小时布林中轨
-                '3d': '4h',   # 3天 -> 4小时布林中轨
-                '1w': '1d'    # 1周 -> 1天布林中轨
-            }
-        else:
-            # 修改策略：去掉4H，所有止盈改为3分钟布林中轨
-            self.timeframes = ['8h', '12h', '1d', '3d', '1w']
-            self.take_profit_timeframes = {
-                '8h': '3m',   # 8小时 -> 3分钟布林中轨
-                '12h': '3m',  # 12小时 -> 3分钟布林中轨
-                '1d': '3m',   # 1天 -> 3分钟布林中轨
-                '3d': '3m',   # 3天 -> 3分钟布林中轨
-                '1w': '3m'    # 1周 -> 3分钟布林中轨
-            }
+        # 非 'original' 的类型均按修改策略处理；复制一份，避免实例修改影响模块级配置
+        config = STRATEGY_CONFIGS['original' if strategy_type == 'original' else 'modified']
+        self.timeframes = list(config['timeframes'])
+        self.take_profit_timeframes = dict(config['take_profit_timeframes'])
         
         # 【优化】不同时间框架对应不同的EMA组合
         self.timeframe_ema_mapping = {
@@ -74,32 +183,134 @@ class MultiTimeframeStrategy:
         
         # 线程锁
         self.lock = threading.Lock()
+        
+        # K线短期缓存：{(symbol, interval, limit): (写入时间, DataFrame)}，避免短时间内重复请求
+        self.kline_cache = {}
+        self.kline_cache_ttl = 60      # 缓存有效期（秒）
+        self.kline_cache_size = 512    # 最大缓存条目数
+        # 空结果的负缓存：{(symbol, interval, limit): 写入时间}，近期无数据的组合不再发起请求。
+        # 默认关闭：数据源超时/异常时同样返回空结果，线上开启会让短暂故障屏蔽该币种；测试脚本可设为True
+        self.kline_empty_cache_enabled = False
+        self.kline_empty_cache = {}
+        self.kline_empty_ttl = 30      # 负缓存有效期（秒）
+        # K线磁盘缓存：默认关闭，设置目录后跨进程复用最近获取的K线（按文件修改时间判断是否过期）
+        self.kline_disk_cache_dir = None
+        self.kline_disk_cache_ttl = 300  # 磁盘缓存有效期（秒）
     
     def get_beijing_time(self):
         """获取北京时间 (UTC+8)"""
         return datetime.now(self.beijing_tz)
         
     def get_klines_data(self, symbol: str, interval: str, limit: int = 1000) -> pd.DataFrame:
+        """获取K线数据（带TTL缓存）；返回副本，调用方可以安全地原地修改"""
+        key = (symbol, interval, limit)
+        now = time.monotonic()
+        with self.lock:
+            cached = self.kline_cache.get(key)
+            empty_ts = self.kline_empty_cache.get(key)
+        if cached is not None and now - cached[0] < self.kline_cache_ttl:
+            return cached[1].copy()
+        if empty_ts is not None and now - empty_ts < self.kline_empty_ttl:
+            return pd.DataFrame()
+        
+        df = self._load_klines_from_disk(key)
+        if df is None:
+            df = self._fetch_klines_data(symbol, interval, limit)
+            if not df.empty:
+                self._save_klines_to_disk(key, df)
+        if df.empty:
+            if self.kline_empty_cache_enabled:
+                with self.lock:
+                    self.kline_empty_cache[key] = now
+                    if len(self.kline_empty_cache) > self.kline_cache_size:
+                        for k in [k for k, ts in self.kline_empty_cache.items() if now - ts >= self.kline_empty_ttl]:
+                            del self.kline_empty_cache[k]
+        else:
+            with self.lock:
+                self.kline_cache.pop(key, None)
+                self.kline_cache[key] = (now, df)
+                if len(self.kline_cache) > self.kline_cache_size:
+                    # 先清理过期条目，仍超出上限时按写入顺序淘汰最早的条目
+                    for k in [k for k, (ts, _) in self.kline_cache.items() if now - ts >= self.kline_cache_ttl]:
+                        del self.kline_cache[k]
+                    while len(self.kline_cache) > self.kline_cache_size:
+                        del self.kline_cache[next(iter(self.kline_cache))]
+            return df.copy()
+        return df
+    
+    def _klines_disk_path(self, key: Tuple[str, str, int]) -> str:
+        symbol, interval, limit = key
+        ext = 'parquet' if PYARROW_AVAILABLE else 'pkl'
+        filename = f"{symbol.replace('/', '_')}_{interval}_{limit}.{ext}"
+        return os.path.join(self.kline_disk_cache_dir, filename)
+    
+    def _load_klines_from_disk(self, key: Tuple[str, str, int]) -> Optional[pd.DataFrame]:
+        """读取未过期的磁盘缓存；未启用、不存在或已过期时返回None"""
+        if not self.kline_disk_cache_dir:
+            return None
+        path = self._klines_disk_path(key)
+        try:
+            if time.time() - os.path.getmtime(path) >= self.kline_disk_cache_ttl:
+                return None
+            return pd.read_parquet(path) if PYARROW_AVAILABLE else pd.read_pickle(path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"读取K线磁盘缓存失败 {path}: {e}")
+            return None
+    
+    def _save_klines_to_disk(self, key: Tuple[str, str, int], df: pd.DataFrame):
+        """写入磁盘缓存：先写临时文件再原子替换，并发的进程/线程不会读到半个文件"""
+        if not self.kline_disk_cache_dir:
+            return
+        path = self._klines_disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.kline_disk_cache_dir, exist_ok=True)
+            if PYARROW_AVAILABLE:
+                df.to_parquet(tmp_path)
+            else:
+                df.to_pickle(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"写入K线磁盘缓存失败 {path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+    
+    def is_klines_known_empty(self, symbol: str, interval: str, limit: int = 1000) -> bool:
+        """该组合近期是否已确认无数据（命中负缓存），调用方可据此跳过整个分析流程"""
+        with self.lock:
+            empty_ts = self.kline_empty_cache.get((symbol, interval, limit))
+        return empty_ts is not None and time.monotonic() - empty_ts < self.kline_empty_ttl
+    
+    def _max_ema_period(self, timeframe: str) -> int:
+        """该时间框架EMA组合中的最大周期，决定分析所需的K线数量"""
+        ema_periods = self.timeframe_ema_mapping.get(timeframe, [89, 144, 233])
+        return max(ema_periods) if ema_periods else 233
+    
+    def _fetch_klines_data(self, symbol: str, interval: str, limit: int = 1000) -> pd.DataFrame:
         """获取K线数据 - 优先使用Gate.io API"""
         try:
             # 首先尝试Gate.io API
             gate_result = self._get_gate_klines(symbol, interval, limit)
             if gate_result is not None and not gate_result.empty:
-                logger.info(f"成功从 Gate.io 获取 {symbol} {interval} 的数据")
+                logger.info("成功从 Gate.io 获取 %s %s 的数据", symbol, interval)
                 return gate_result
             
             # Gate.io失败时，尝试币安期货API作为备用
-            logger.warning(f"Gate.io 获取失败, 尝试使用 Binance Futures API: {symbol} {interval}")
+            logger.warning("Gate.io 获取失败, 尝试使用 Binance Futures API: %s %s", symbol, interval)
             binance_result = self._get_binance_futures_klines(symbol, interval, limit)
             if binance_result is not None and not binance_result.empty:
-                logger.info(f"成功从 Binance Futures API 获取 {symbol} {interval} 的数据")
+                logger.info("成功从 Binance Futures API 获取 %s %s 的数据", symbol, interval)
                 return binance_result
             
             # 最后尝试币安现货API
-            logger.warning(f"Binance Futures API 获取失败, 尝试使用 Binance Spot API: {symbol} {interval}")
+            logger.warning("Binance Futures API 获取失败, 尝试使用 Binance Spot API: %s %s", symbol, interval)
             spot_result = self._get_binance_spot_klines(symbol, interval, limit)
             if spot_result is not None and not spot_result.empty:
-                logger.info(f"成功从 Binance Spot API 获取 {symbol} {interval} 的数据")
+                logger.info("成功从 Binance Spot API 获取 %s %s 的数据", symbol, interval)
                 return spot_result
 
             logger.error(f"所有数据源均未能获取到 {symbol} {interval} 的数据")
@@ -256,7 +467,7 @@ class MultiTimeframeStrategy:
             data = response.json()
 
             if not isinstance(data, list) or not data:
-                logger.warning(f"Gate.io 返回空数据或无效数据格式 for {symbol} on {interval}")
+                logger.warning("Gate.io 返回空数据或无效数据格式 for %s on %s", symbol, interval)
                 return pd.DataFrame() # 返回空DataFrame表示币种可能不存在
 
             # --- 核心修复 ---
@@ -362,7 +573,7 @@ class MultiTimeframeStrategy:
                 # 重新排列列顺序并设置索引
                 df = df[['open', 'high', 'low', 'close', 'volume']]
                 df.set_index('timestamp', inplace=True)
-                logger.info(f"币安期货API成功获取 {binance_symbol} 数据")
+                logger.info("币安期货API成功获取 %s 数据", binance_symbol)
                 # 保持时间升序，不反转数据
                 return df
                 
@@ -437,7 +648,7 @@ class MultiTimeframeStrategy:
                 # 重新排列列顺序并设置索引
                 df = df[['open', 'high', 'low', 'close', 'volume']]
                 df.set_index('timestamp', inplace=True)
-                logger.info(f"币安现货API成功获取 {binance_symbol} 数据")
+                logger.info("币安现货API成功获取 %s 数据", binance_symbol)
                 # 保持时间升序，不反转数据
                 return df
                 
@@ -464,33 +675,80 @@ class MultiTimeframeStrategy:
         # 获取对应时间框架的EMA组合
         ema_periods = self.timeframe_ema_mapping.get(timeframe, [89, 144, 233])
         
+        close = df['close'].to_numpy(dtype=np.float64)
+        # numba内核不处理NaN的衰减权重，含NaN时仍交给pandas
+        if NUMBA_AVAILABLE and len(close) > 0 and not np.isnan(close).any():
+            alphas = np.array([2.0 / (period + 1) for period in ema_periods], dtype=np.float64)
+            out = np.empty((len(close), len(ema_periods)), dtype=np.float64)
+            _ema_multi(close, alphas, out)
+            for j, period in enumerate(ema_periods):
+                df[f'ema{period}'] = out[:, j]
+            return df
+        
         for period in ema_periods:
             df[f'ema{period}'] = df['close'].ewm(span=period, adjust=False).mean()
         return df
     
-    def calculate_bollinger_bands(self, df: pd.DataFrame, period: int = 20, std: float = 2) -> pd.DataFrame:
-        """【已优化】使用Pandas内置函数计算布林带，性能更高"""
+    def calculate_bollinger_bands(self, df: pd.DataFrame, period: int = 20, std: float = 2,
+                                  trim_warmup: bool = False) -> pd.DataFrame:
+        """【已优化】使用Pandas内置函数计算布林带，性能更高
+        
+        trim_warmup=True 时直接返回切掉前period-1行预热区的结果（一次连续切片），
+        调用方无需再执行dropna；EMA(adjust=False)没有预热NaN，布林带窗口是唯一的NaN来源
+        """
+        close = df['close'].to_numpy(dtype=np.float64)
+        if NUMBA_AVAILABLE and period >= 2 and len(close) > 0 and not np.isnan(close).any():
+            mid = np.empty_like(close)
+            std_out = np.empty_like(close)
+            upper = np.empty_like(close)
+            lower = np.empty_like(close)
+            _bbands(close, int(period), float(std), mid, std_out, upper, lower)
+            df['bb_middle'] = mid
+            df['bb_std'] = std_out
+            df['bb_upper'] = upper
+            df['bb_lower'] = lower
+            return df.iloc[period - 1:] if trim_warmup else df
+        
         df['bb_middle'] = df['close'].rolling(window=period).mean()
         df['bb_std'] = df['close'].rolling(window=period).std()
         df['bb_upper'] = df['bb_middle'] + (df['bb_std'] * std)
         df['bb_lower'] = df['bb_middle'] - (df['bb_std'] * std)
-        return df
+        return df.iloc[period - 1:] if trim_warmup else df
+    
+    def _latest_trend_emas(self, df: pd.DataFrame) -> Optional[Tuple[float, float, float]]:
+        """读取最新一根K线的EMA89/144/233（直接取底层数组末尾元素，不构造行Series）；缺列或无数据时返回None"""
+        if len(df) < 1 or not all(ema in df.columns for ema in TREND_EMA_COLUMNS):
+            return None
+        # 使用最新数据（时间升序，最新在最后）
+        return tuple(float(df[ema].to_numpy()[-1]) for ema in TREND_EMA_COLUMNS)
     
     def is_bullish_trend(self, df: pd.DataFrame) -> bool:
         """判断是否为多头趋势（EMA89 > EMA144 > EMA233，377可选）"""
-        required_emas = ['ema89', 'ema144', 'ema233']
-        if not all(ema in df.columns for ema in required_emas) or len(df) < 1:
-            return False
-        # 使用最新数据（时间升序，最新在最后）
-        return df['ema89'].iloc[-1] > df['ema144'].iloc[-1] > df['ema233'].iloc[-1]
+        emas = self._latest_trend_emas(df)
+        return emas is not None and bool(emas[0] > emas[1] > emas[2])
     
     def is_bearish_trend(self, df: pd.DataFrame) -> bool:
         """判断是否为空头趋势（EMA89 < EMA144 < EMA233，377可选）"""
-        required_emas = ['ema89', 'ema144', 'ema233']
-        if not all(ema in df.columns for ema in required_emas) or len(df) < 1:
-            return False
-        # 使用最新数据（时间升序，最新在最后）
-        return df['ema89'].iloc[-1] < df['ema144'].iloc[-1] < df['ema233'].iloc[-1]
+        emas = self._latest_trend_emas(df)
+        return emas is not None and bool(emas[0] < emas[1] < emas[2])
+    
+    def classify_trend(self, df: pd.DataFrame) -> str:
+        """一次读取最新EMA值判断趋势，返回 'bullish' / 'bearish' / 'neutral'"""
+        return self.classify_trend_strength(df)[0]
+    
+    def classify_trend_strength(self, df: pd.DataFrame) -> Tuple[str, str]:
+        """判断趋势及强度，返回 (趋势, 'strong' / 'weak')；比较结果编码为键后查 TREND_TABLE"""
+        emas = self._latest_trend_emas(df)
+        if emas is None:
+            return 'neutral', 'weak'
+        ema89, ema144, ema233 = emas
+        # 比较结果先转int再相减（numpy布尔值不支持减法）；NaN参与的比较均为False，编码为0，落到中性
+        key = (
+            int(ema89 > ema144) - int(ema89 < ema144),
+            int(ema144 > ema233) - int(ema144 < ema233),
+            int(ema89 > ema144 * (1 + TREND_STRENGTH_SPREAD)) - int(ema89 < ema144 * (1 - TREND_STRENGTH_SPREAD)),
+        )
+        return TREND_TABLE[key]
     
     def check_ema_frequency(self, symbol: str, timeframe: str, ema_period: int, current_time: datetime) -> bool:
         """【优化】检查EMA使用频率，避免短期内重复触发"""
@@ -547,7 +805,8 @@ class MultiTimeframeStrategy:
         current_candle = df.iloc[-1]
         current_price = current_candle['close']
         current_time = self.get_beijing_time()
-        avg_volume = df['volume'].rolling(window=20).mean().iloc[-2] if len(df) >= 21 else df['volume'].mean()
+        # 前一根K线的20周期均量：只取所需窗口，不对整列做rolling
+        avg_volume = df['volume'].to_numpy()[-21:-1].mean() if len(df) >= 21 else df['volume'].mean()
         available_levels = []
 
         # 【优化】根据时间框架获取对应的EMA组合
@@ -736,62 +995,63 @@ class MultiTimeframeStrategy:
         
         # 寻找最近20根K线的支撑阻力位（使用tail获取最新20根）
         recent_data = df.tail(20)
-        highs = recent_data['high'].values
-        lows = recent_data['low'].values
+        highs = recent_data['high'].to_numpy(dtype=np.float64)
+        lows = recent_data['low'].to_numpy(dtype=np.float64)
+        signal_time = current_time.strftime('%Y-%m-%d %H:%M:%S') if hasattr(current_time, 'strftime') else str(current_time)
         
-        # 寻找阻力位（局部高点）
-        for i in range(1, len(highs) - 1):
-            if highs[i] > highs[i-1] and highs[i] > highs[i+1]:
-                resistance = highs[i]
-                distance = abs(current_price - resistance) / resistance
-                if distance <= 0.03:  # 3%范围内
-                    condition = f"价格接近阻力位 (价格:{current_price:.4f} 接近阻力:{resistance:.4f})"
-                    signals.append({
-                        'type': 'resistance',
-                        'signal': 'short',
-                        'level': float(resistance),
-                        'current_price': float(current_price),
-                        'distance': float(distance),
-                        'ema_period': None,  # 支撑阻力信号不基于EMA
-                        'entry_price': float(current_price),
-                        'signal_time': current_time.strftime('%Y-%m-%d %H:%M:%S') if hasattr(current_time, 'strftime') else str(current_time),
-                        'condition': condition,
-                        'description': f"价格({current_price:.4f})接近阻力位({resistance:.4f})，距离{distance:.2%}，建议做空"
-                    })
+        # 向量化找出局部高低点，并筛选距离当前价格3%以内的位置
+        mid_highs = highs[1:-1]
+        mid_lows = lows[1:-1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            high_distances = np.abs(current_price - mid_highs) / mid_highs
+            low_distances = np.abs(current_price - mid_lows) / mid_lows
+        is_resistance = (mid_highs > highs[:-2]) & (mid_highs > highs[2:]) & (high_distances <= 0.03)
+        is_support = (mid_lows < lows[:-2]) & (mid_lows < lows[2:]) & (low_distances <= 0.03)
         
-        # 寻找支撑位（局部低点）
-        for i in range(1, len(lows) - 1):
-            if lows[i] < lows[i-1] and lows[i] < lows[i+1]:
-                support = lows[i]
-                distance = abs(current_price - support) / support
-                if distance <= 0.03:  # 3%范围内
-                    condition = f"价格接近支撑位 (价格:{current_price:.4f} 接近支撑:{support:.4f})"
-                    signals.append({
-                        'type': 'support',
-                        'signal': 'long',
-                        'level': float(support),
-                        'current_price': float(current_price),
-                        'distance': float(distance),
-                        'ema_period': None,  # 支撑阻力信号不基于EMA
-                        'entry_price': float(current_price),
-                        'signal_time': current_time.strftime('%Y-%m-%d %H:%M:%S') if hasattr(current_time, 'strftime') else str(current_time),
-                        'condition': condition,
-                        'description': f"价格({current_price:.4f})接近支撑位({support:.4f})，距离{distance:.2%}，建议做多"
-                    })
+        # 阻力位（局部高点）
+        for resistance, distance in zip(mid_highs[is_resistance].tolist(), high_distances[is_resistance].tolist()):
+            condition = f"价格接近阻力位 (价格:{current_price:.4f} 接近阻力:{resistance:.4f})"
+            signals.append({
+                'type': 'resistance',
+                'signal': 'short',
+                'level': float(resistance),
+                'current_price': float(current_price),
+                'distance': float(distance),
+                'ema_period': None,  # 支撑阻力信号不基于EMA
+                'entry_price': float(current_price),
+                'signal_time': signal_time,
+                'condition': condition,
+                'description': f"价格({current_price:.4f})接近阻力位({resistance:.4f})，距离{distance:.2%}，建议做空"
+            })
+        
+        # 支撑位（局部低点）
+        for support, distance in zip(mid_lows[is_support].tolist(), low_distances[is_support].tolist()):
+            condition = f"价格接近支撑位 (价格:{current_price:.4f} 接近支撑:{support:.4f})"
+            signals.append({
+                'type': 'support',
+                'signal': 'long',
+                'level': float(support),
+                'current_price': float(current_price),
+                'distance': float(distance),
+                'ema_period': None,  # 支撑阻力信号不基于EMA
+                'entry_price': float(current_price),
+                'signal_time': signal_time,
+                'condition': condition,
+                'description': f"价格({current_price:.4f})接近支撑位({support:.4f})，距离{distance:.2%}，建议做多"
+            })
         
         return signals
     
     def analyze_symbol(self, symbol: str) -> Dict:
         """分析单个币种的所有时间框架"""
-        logger.info(f"开始分析币种: {symbol}")
+        logger.info("开始分析币种: %s", symbol)
         results = []
         
         for timeframe in self.timeframes:
             try:
                 # 获取K线数据
                 # 根据时间框架的EMA组合动态计算所需数据量
-                ema_periods = self.timeframe_ema_mapping.get(timeframe, [89, 144, 233])
-                max_ema = max(ema_periods) if ema_periods else 233
+                max_ema = self._max_ema_period(timeframe)
                 required_data_points = max_ema + 50  # 最大EMA周期 + 50个缓冲
                 df = self.get_klines_data(symbol, timeframe, required_data_points)
                 if df.empty or len(df) < max_ema:  # 检查是否满足最大EMA周期
@@ -812,15 +1072,7 @@ class MultiTimeframeStrategy:
 
                 # 判断趋势 (使用最新的有效数据)
                 latest_data = df.iloc[-1]  # 最新数据在最后
-                if self.is_bullish_trend(df):
-                    trend = 'bullish'
-                    trend_strength = 'strong' if latest_data['ema89'] > latest_data['ema144'] * 1.01 else 'weak'
-                elif self.is_bearish_trend(df):
-                    trend = 'bearish'
-                    trend_strength = 'strong' if latest_data['ema89'] < latest_data['ema144'] * 0.99 else 'weak'
-                else:
-                    trend = 'neutral'
-                    trend_strength = 'weak'
+                trend, trend_strength = self.classify_trend_strength(df)
                 
                 # 【优化】根据时间框架使用对应的EMA组合，并检查使用频率
                 pullback_levels = self.find_ema_pullback_levels(df, trend, timeframe, symbol)
@@ -860,9 +1112,9 @@ class MultiTimeframeStrategy:
                         seen_signals.add(signal_key)
                         unique_signals.append(signal)
                     else:
-                        logger.debug(f"策略层去重信号: {signal_key}")
+                        logger.debug("策略层去重信号: %s", signal_key)
                 
-                logger.info(f"策略层去重: {len(all_signals)} -> {len(unique_signals)} 个信号")
+                logger.info("策略层去重: %d -> %d 个信号", len(all_signals), len(unique_signals))
                 all_signals = unique_signals
                 
                 # 计算止盈目标 - 使用3分钟布林中轨
@@ -893,16 +1145,16 @@ class MultiTimeframeStrategy:
                             # 做空信号：3分钟布林中轨应该低于入场价格
                             if bb_middle >= entry_price:
                                 signal_valid = False
-                                logger.info(f"【止损】{symbol} {timeframe} 做空信号被舍弃：入场价{entry_price:.4f}，3分钟布林中轨{bb_middle:.4f}")
+                                logger.info("【止损】%s %s 做空信号被舍弃：入场价%.4f，3分钟布林中轨%.4f", symbol, timeframe, entry_price, bb_middle)
                         else:
                             # 做多信号：3分钟布林中轨应该高于入场价格
                             if bb_middle <= entry_price:
                                 signal_valid = False
-                                logger.info(f"【止损】{symbol} {timeframe} 做多信号被舍弃：入场价{entry_price:.4f}，3分钟布林中轨{bb_middle:.4f}")
+                                logger.info("【止损】%s %s 做多信号被舍弃：入场价%.4f，3分钟布林中轨%.4f", symbol, timeframe, entry_price, bb_middle)
                         
                         if signal_valid:
                             take_profit_price = bb_middle
-                            logger.info(f"【止盈】{symbol} {timeframe} 信号有效：入场价{entry_price:.4f}，3分钟布林中轨{bb_middle:.4f}")
+                            logger.info("【止盈】%s %s 信号有效：入场价%.4f，3分钟布林中轨%.4f", symbol, timeframe, entry_price, bb_middle)
                         else:
                             # 信号被止损，不设置止盈价格
                             take_profit_price = None
@@ -915,7 +1167,7 @@ class MultiTimeframeStrategy:
                 else:
                     # 如果没有止盈价格（被止损），过滤掉所有信号
                     valid_signals = []
-                    logger.info(f"【过滤】{symbol} {timeframe} 所有信号被止损过滤")
+                    logger.info("【过滤】%s %s 所有信号被止损过滤", symbol, timeframe)
 
                 results.append({
                     'timeframe': timeframe, 'status': 'success',
@@ -33,8 +33,7 @@ def test_clean_signals():
             
             # 计算指标
             df = strategy.calculate_emas(df)
-            df = strategy.calculate_bollinger_bands(df)
-            df.dropna(inplace=True)
+            df = strategy.calculate_bollinger_bands(df, trim_warmup=True)
             
             if df.empty:
                 print(f"  计算指标后无数据")
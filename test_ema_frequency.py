@@ -36,8 +36,7 @@ def test_ema_frequency_limit():
         
         # 计算指标
         df = strategy.calculate_emas(df, test_timeframe)
-        df = strategy.calculate_bollinger_bands(df)
-        df.dropna(inplace=True)
+        df = strategy.calculate_bollinger_bands(df, trim_warmup=True)
         
         if df.empty:
             print("计算指标后无数据")
@@ -3,6 +3,7 @@
 最终测试去重效果
 """
 
+import sys
 import requests
 import json
 from collections import defaultdict
@@ -26,11 +27,9 @@ def test_final_deduplication():
                 signals = data.get('signals', [])
                 print(f"信号总数: {len(signals)}")
                 
-                # 分析重复信号
-                signal_groups = defaultdict(list)
-                for signal in signals:
-                    # 创建信号标识
-                    signal_id = (
+                # 分析重复信号：单次遍历，只保留重复项
+                def make_key(signal):
+                    return (
                         signal.get('symbol', ''),
                         signal.get('timeframe', ''),
                         signal.get('signal_type', ''),
@@ -39,15 +38,25 @@ def test_final_deduplication():
                         signal.get('type', ''),
                         round(signal.get('distance', 0), 8)
                     )
-                    signal_groups[signal_id].append(signal)
-                
-                # 检查重复
-                duplicates = {k: v for k, v in signal_groups.items() if len(v) > 1}
-                if duplicates:
+
+                seen = set()
+                dups = []
+                for signal in signals:
+                    signal_id = make_key(signal)
+                    if signal_id in seen:
+                        dups.append(signal)
+                    else:
+                        seen.add(signal_id)
+
+                # 检查重复（仅在存在重复时才分组，便于排查）
+                if dups:
+                    duplicates = defaultdict(lambda: 1)
+                    for signal in dups:
+                        duplicates[make_key(signal)] += 1
                     print(f"❌ 发现 {len(duplicates)} 组重复信号:")
-                    for signal_id, signal_list in list(duplicates.items())[:3]:  # 只显示前3组
+                    for signal_id, count in list(duplicates.items())[:3]:  # 只显示前3组
                         print(f"重复组: {signal_id}")
-                        print(f"  重复数量: {len(signal_list)}")
+                        print(f"  重复数量: {count}")
                 else:
                     print("✅ 无重复信号！去重成功！")
                 
@@ -56,14 +65,15 @@ def test_final_deduplication():
                 for signal in signals:
                     symbol_counts[signal.get('symbol', '')] += 1
                 
-                print(f"\n按币种统计:")
+                out = ["", "按币种统计:"]
                 for symbol, count in symbol_counts.items():
-                    print(f"  {symbol}: {count} 个信号")
+                    out.append(f"  {symbol}: {count} 个信号")
                 
                 # 显示前10个信号
-                print(f"\n前10个信号:")
+                out.extend(["", "前10个信号:"])
                 for i, signal in enumerate(signals[:10]):
-                    print(f"  {i+1}. {signal.get('symbol')} {signal.get('timeframe')} {signal.get('signal_type')} 收益率:{signal.get('profit_pct')}%")
+                    out.append(f"  {i+1}. {signal.get('symbol')} {signal.get('timeframe')} {signal.get('signal_type')} 收益率:{signal.get('profit_pct')}%")
+                sys.stdout.write("\n".join(out) + "\n")
                     
             else:
                 print(f"❌ 分析失败: {data.get('error', '未知错误')}")
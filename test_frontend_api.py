@@ -3,8 +3,12 @@
 测试前端API调用
 """
 
-import requests
-import json
+import sys
+from collections import defaultdict
+
+
+from testing_utils import session as _session, json_loads
+
 
 def test_frontend_api_calls():
     """测试前端API调用"""
@@ -13,9 +17,9 @@ def test_frontend_api_calls():
     # 1. 测试获取币种列表
     print("\n1. 测试获取币种列表")
     try:
-        response = requests.get('http://localhost:5000/multi_timeframe/get_top_symbols', timeout=10)
+        response = _session.get('http://localhost:5000/multi_timeframe/get_top_symbols', timeout=10)
         if response.status_code == 200:
-            data = response.json()
+            data = json_loads(response.content)
             print(f"成功获取 {data['count']} 个币种")
             print(f"前5个币种: {data['symbols'][:5]}")
             symbols = data['symbols'][:5]  # 只取前5个测试
@@ -29,31 +33,33 @@ def test_frontend_api_calls():
     # 2. 测试分析多个币种
     print(f"\n2. 测试分析多个币种: {symbols}")
     try:
-        response = requests.post('http://localhost:5000/multi_timeframe/analyze_multiple_symbols', 
+        response = _session.post('http://localhost:5000/multi_timeframe/analyze_multiple_symbols', 
                                json={'symbols': symbols}, timeout=60)
         if response.status_code == 200:
-            data = response.json()
+            data = json_loads(response.content)
+            signals = data.get('signals') or ()
             if data['success']:
                 print(f"分析成功:")
                 print(f"  请求币种: {data['symbols_requested']}")
                 print(f"  处理币种: {data['symbols_processed']}")
                 print(f"  总信号数: {data['total_signals']}")
                 
-                # 分析信号分布
-                signal_by_symbol = {}
-                for signal in data.get('signals', []):
-                    symbol = signal['symbol']
-                    signal_by_symbol[symbol] = signal_by_symbol.get(symbol, 0) + 1
+                # 分析信号分布（单次遍历按币种分组）
+                buckets = defaultdict(list)
+                for signal in signals:
+                    buckets[signal['symbol']].append(signal)
+                signal_by_symbol = {symbol: len(items) for symbol, items in buckets.items()}
                 
                 print(f"  按币种分布: {signal_by_symbol}")
                 
-                # 显示每个币种的信号详情
+                # 显示每个币种的信号详情（缓冲后一次性输出）
+                out = []
                 for symbol in symbols:
-                    symbol_signals = [s for s in data.get('signals', []) if s['symbol'] == symbol]
-                    print(f"  {symbol}: {len(symbol_signals)} 个信号")
-                    if symbol_signals:
-                        for signal in symbol_signals[:3]:  # 只显示前3个
-                            print(f"    {signal['timeframe']} {signal['signal_type']} 收益率:{signal['profit_pct']}%")
+                    symbol_signals = buckets.get(symbol, [])
+                    out.append(f"  {symbol}: {len(symbol_signals)} 个信号")
+                    for signal in symbol_signals[:3]:  # 只显示前3个
+                        out.append(f"    {signal['timeframe']} {signal['signal_type']} 收益率:{signal['profit_pct']}%")
+                sys.stdout.write("\n".join(out) + "\n")
                 
                 return data
             else:
@@ -65,5 +71,8 @@ def test_frontend_api_calls():
     return None
 
 if __name__ == "__main__":
-    test_frontend_api_calls()
+    try:
+        test_frontend_api_calls()
+    finally:
+        _session.close()
 
@@ -4,17 +4,29 @@
 测试前端数据格式兼容性
 """
 
-import requests
 import json
+import time
+
+from testing_utils import session as _session, json_loads
+
+# 前端期望字段（元组保持显示顺序，frozenset用于集合运算）
+EXPECTED_FIELDS = (
+    'symbol', 'timeframe', 'trend', 'signal_type',
+    'entry_price', 'take_profit', 'profit_pct',
+    'signal_time', 'ema_period'
+)
+EXPECTED_FIELD_SET = frozenset(EXPECTED_FIELDS)
+NUMERIC_FIELDS = frozenset({'entry_price', 'take_profit', 'profit_pct'})
+STRING_FIELDS = frozenset({'symbol', 'timeframe', 'trend', 'signal_type', 'signal_time'})
+
 
 def test_frontend_data_format():
     try:
         # 测试API响应
-        response = requests.post('http://localhost:5000/multi_timeframe/analyze_multiple_symbols', 
-                                json={'symbols': ['BTCUSDT']},
-                                headers={'Content-Type': 'application/json'})
+        response = _session.post('http://localhost:5000/multi_timeframe/analyze_multiple_symbols', 
+                                json={'symbols': ['BTCUSDT']})
         
-        data = response.json()
+        data = json_loads(response.content)
         print('=== API响应测试 ===')
         print(f'状态码: {response.status_code}')
         print(f'成功: {data.get("success")}')
@@ -33,49 +45,37 @@ def test_frontend_data_format():
             
             # 检查前端期望的字段
             print('\n=== 前端期望字段检查 ===')
-            expected_fields = [
-                'symbol', 'timeframe', 'trend', 'signal_type', 
-                'entry_price', 'take_profit', 'profit_pct', 
-                'signal_time', 'ema_period'
-            ]
-            
-            missing_fields = []
-            for field in expected_fields:
-                if field not in first_signal:
-                    missing_fields.append(field)
-                else:
+            missing = EXPECTED_FIELD_SET - first_signal.keys()
+            missing_fields = [field for field in EXPECTED_FIELDS if field in missing]
+            for field in EXPECTED_FIELDS:
+                if field not in missing:
                     value = first_signal[field]
                     print(f'  ✅ {field}: {type(value).__name__} = {value}')
             
             if missing_fields:
                 print(f'  ❌ 缺少字段: {missing_fields}')
             
-            # 检查数据类型问题
+            # 检查数据类型问题（一次遍历全部信号）
             print('\n=== 数据类型检查 ===')
             type_issues = []
             
-            # 检查数值类型
-            numeric_fields = ['entry_price', 'take_profit', 'profit_pct']
-            for field in numeric_fields:
-                if field in first_signal:
-                    value = first_signal[field]
+            for index, signal in enumerate(signals):
+                keys = signal.keys()
+                for field in NUMERIC_FIELDS & keys:
+                    value = signal[field]
                     if not isinstance(value, (int, float)):
-                        type_issues.append(f'{field} 不是数值类型: {type(value)}')
-            
-            # 检查字符串类型
-            string_fields = ['symbol', 'timeframe', 'trend', 'signal_type', 'signal_time']
-            for field in string_fields:
-                if field in first_signal:
-                    value = first_signal[field]
+                        type_issues.append(f'信号{index} {field} 不是数值类型: {type(value)}')
+                for field in STRING_FIELDS & keys:
+                    value = signal[field]
                     if not isinstance(value, str):
-                        type_issues.append(f'{field} 不是字符串类型: {type(value)}')
+                        type_issues.append(f'信号{index} {field} 不是字符串类型: {type(value)}')
             
             if type_issues:
-                print('  ❌ 数据类型问题:')
-                for issue in type_issues:
+                print(f'  ❌ 数据类型问题 ({len(type_issues)} 项):')
+                for issue in type_issues[:20]:
                     print(f'    - {issue}')
             else:
-                print('  ✅ 数据类型正确')
+                print(f'  ✅ 数据类型正确 (共检查 {len(signals)} 个信号)')
             
             # 检查特殊值
             print('\n=== 特殊值检查 ===')
@@ -88,12 +88,15 @@ def test_frontend_data_format():
             if first_signal.get('ema_period') is None:
                 print('  ⚠️  ema_period 为 None')
         
-        # 测试JSON序列化
+        # 测试JSON序列化（使用与Flask、前端一致的标准库json）
         print('\n=== JSON序列化测试 ===')
         try:
+            t0 = time.perf_counter_ns()
             json_str = json.dumps(data, ensure_ascii=False, indent=2)
+            elapsed_ms = (time.perf_counter_ns() - t0) / 1e6
             print('  ✅ JSON序列化成功')
             print(f'  JSON长度: {len(json_str)} 字符')
+            print(f'  序列化耗时: {elapsed_ms:.2f} ms')
         except Exception as e:
             print(f'  ❌ JSON序列化失败: {e}')
         
@@ -103,4 +106,7 @@ def test_frontend_data_format():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    test_frontend_data_format()
+    try:
+        test_frontend_data_format()
+    finally:
+        _session.close()
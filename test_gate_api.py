@@ -4,8 +4,53 @@
 测试GATE.IO API连接
 """
 
+import sys
+import threading
+import numpy as np
 import requests
-import json
+from concurrent.futures import ThreadPoolExecutor
+
+from testing_utils import session as _session, json_loads
+
+# 本次运行内的条件请求缓存：{请求URL: {'etag', 'last_modified', 'body'}}，只保存在内存中
+_http_cache = {}
+_http_cache_lock = threading.Lock()
+
+
+def cached_get(session, url, params=None, timeout=10):
+    """带ETag/Last-Modified校验的GET请求，返回(状态码, 响应体)
+
+    304时状态码原样返回（表示内容未变化），响应体取本次运行中此前获取的内容
+    """
+    key = requests.Request('GET', url, params=params).prepare().url
+    with _http_cache_lock:
+        entry = _http_cache.get(key)
+    
+    headers = {}
+    if entry:
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+    
+    response = session.get(url, params=params, headers=headers, timeout=timeout)
+    
+    if response.status_code == 304 and entry:
+        print("  (304 Not Modified，内容未变化)")
+        return 304, entry['body']
+    
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    if response.status_code == 200 and (etag or last_modified):
+        with _http_cache_lock:
+            _http_cache[key] = {
+                'etag': etag,
+                'last_modified': last_modified,
+                'body': response.content
+            }
+    
+    return response.status_code, response.content
+
 
 def test_gate_api():
     """测试GATE.IO API"""
@@ -14,26 +59,35 @@ def test_gate_api():
     try:
         # 测试获取交易对数据
         url = "https://api.gateio.ws/api/v4/spot/tickers"
-        response = requests.get(url, timeout=10)
+        status_code, content = cached_get(_session, url, timeout=10)
         
-        print(f"API响应状态: {response.status_code}")
+        print(f"API响应状态: {status_code}")
         
-        if response.status_code == 200:
-            data = response.json()
+        if status_code in (200, 304):
+            data = json_loads(content)
             print(f"获取到{len(data)}个交易对")
             
-            # 筛选USDT交易对
-            usdt_pairs = [t for t in data if t['currency_pair'].endswith('_USDT')]
+            # 筛选USDT交易对，只保留(交易对, 交易量)，释放完整ticker字典
+            usdt_pairs = [
+                (t['currency_pair'], float(t.get('base_volume') or 0.0))
+                for t in data if t['currency_pair'].endswith('_USDT')
+            ]
+            del data
             print(f"USDT交易对数量: {len(usdt_pairs)}")
             
-            # 按交易量排序
-            usdt_pairs.sort(key=lambda x: float(x.get('base_volume', 0)), reverse=True)
+            # 按交易量取前50（argpartition选出候选后只对这50个排序）
+            top_n = min(50, len(usdt_pairs))
+            volumes = np.fromiter((v for _, v in usdt_pairs), dtype=np.float64, count=len(usdt_pairs))
+            top_idx = np.argpartition(-volumes, top_n - 1)[:top_n] if top_n else np.array([], dtype=int)
+            top_idx = top_idx[np.argsort(-volumes[top_idx], kind='stable')]
+            top_pairs = [usdt_pairs[i] for i in top_idx]
             
-            print("前10个USDT交易对:")
-            for i, pair in enumerate(usdt_pairs[:10]):
-                print(f"  {i+1}. {pair['currency_pair']} - 交易量: {pair.get('base_volume', 'N/A')}")
+            out = ["前10个USDT交易对:"]
+            for i, (currency_pair, volume) in enumerate(top_pairs[:10]):
+                out.append(f"  {i+1}. {currency_pair} - 交易量: {volume}")
+            sys.stdout.write("\n".join(out) + "\n")
             
-            return [pair['currency_pair'] for pair in usdt_pairs[:50]]
+            return [currency_pair for currency_pair, _ in top_pairs]
         else:
             print("API请求失败")
             return []
@@ -44,7 +98,7 @@ def test_gate_api():
 
 def test_historical_data(symbol):
     """测试获取历史数据"""
-    print(f"\n测试获取{symbol}历史数据...")
+    out = [f"\n测试获取{symbol}历史数据..."]
     
     try:
         # 获取最近7天的日线数据
@@ -56,27 +110,30 @@ def test_historical_data(symbol):
             'to': 1735689600     # 2025年1月的时间戳
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        status_code, content = cached_get(_session, url, params=params, timeout=10)
         
-        if response.status_code == 200:
-            data = response.json()
-            print(f"获取到{len(data)}条K线数据")
+        if status_code in (200, 304):
+            data = json_loads(content)
+            out.append(f"获取到{len(data)}条K线数据")
             
             if data:
                 # 显示最新数据
                 latest = data[-1]
-                print(f"最新数据: 时间={latest[0]}, 开盘={latest[5]}, 收盘={latest[2]}, 最高={latest[3]}, 最低={latest[4]}")
+                out.append(f"最新数据: 时间={latest[0]}, 开盘={latest[5]}, 收盘={latest[2]}, 最高={latest[3]}, 最低={latest[4]}")
                 return True
             else:
-                print("无历史数据")
+                out.append("无历史数据")
                 return False
         else:
-            print(f"获取历史数据失败: {response.status_code}")
+            out.append(f"获取历史数据失败: {status_code}")
             return False
             
     except Exception as e:
-        print(f"获取历史数据失败: {e}")
+        out.append(f"获取历史数据失败: {e}")
         return False
+    finally:
+        # 多个币种并发请求，整段输出避免交错
+        sys.stdout.write("\n".join(out) + "\n")
 
 def main():
     """主函数"""
@@ -84,17 +141,20 @@ def main():
     print("GATE.IO API测试")
     print("=" * 60)
     
-    # 测试API连接
-    symbols = test_gate_api()
-    
-    if symbols:
-        print(f"\n成功获取{len(symbols)}个币种")
+    try:
+        # 测试API连接
+        symbols = test_gate_api()
         
-        # 测试前3个币种的历史数据
-        for symbol in symbols[:3]:
-            test_historical_data(symbol)
-    else:
-        print("无法获取币种列表")
+        if symbols:
+            print(f"\n成功获取{len(symbols)}个币种")
+            
+            # 并发测试前3个币种的历史数据（共用同一连接池）
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                list(executor.map(test_historical_data, symbols[:3]))
+        else:
+            print("无法获取币种列表")
+    finally:
+        _session.close()
 
 if __name__ == "__main__":
     main()
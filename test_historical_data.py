@@ -11,99 +11,130 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from multi_timeframe_strategy import MultiTimeframeStrategy
 import pandas as pd
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 import logging
 
-# 设置日志
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# 设置日志（BB_TEST_LOG=WARNING 可关闭诊断输出）
+# multi_timeframe_strategy 导入时已配置根日志，需 force=True 才能覆盖级别
+logging.basicConfig(level=os.environ.get('BB_TEST_LOG', 'INFO'),
+                    format='%(asctime)s - %(levelname)s - %(message)s', force=True)
 logger = logging.getLogger(__name__)
 
-def test_single_symbol(symbol: str):
+
+def _analyze_tf(strategy: MultiTimeframeStrategy, symbol: str, timeframe: str) -> int:
+    """分析单个时间框架，返回信号数量"""
+    out = [f"  分析 {timeframe} 时间框架..."]
+    try:
+        # 获取数据
+        # 策略实例自带K线TTL缓存并返回副本，指标计算可原地添加列
+        df = strategy.get_klines_data(symbol, timeframe, 100)
+        if df.empty:
+            out.append(f"    {symbol} {timeframe}: 无数据")
+            return 0
+        
+        # 计算指标
+        df = strategy.calculate_emas(df)
+        df = strategy.calculate_bollinger_bands(df)
+        # EMA(adjust=False)没有预热NaN，只需切掉布林带窗口的前period-1行
+        df = df.iloc[strategy.bb_period - 1:]
+        
+        if df.empty:
+            out.append(f"    {symbol} {timeframe}: 计算指标后无数据")
+            return 0
+        
+        # 判断趋势
+        is_bullish = strategy.is_bullish_trend(df)
+        is_bearish = strategy.is_bearish_trend(df)
+        trend = 'bullish' if is_bullish else 'bearish' if is_bearish else 'neutral'
+        
+        out.append(f"    趋势: {trend}")
+        
+        # 寻找信号
+        pullback_signals = strategy.find_ema_pullback_levels(df, trend)
+        
+        # 计算止盈
+        take_profit_timeframe = strategy.take_profit_timeframes.get(timeframe, '15m')
+        take_profit_price = None
+        
+        try:
+            tp_df = strategy.get_klines_data(symbol, take_profit_timeframe, 50)
+            if not tp_df.empty:
+                tp_df = strategy.calculate_bollinger_bands(tp_df)
+                tp_df = tp_df.iloc[strategy.bb_period - 1:]
+                if not tp_df.empty:
+                    take_profit_price = tp_df['bb_middle'].iloc[-1]
+        except Exception as e:
+            out.append(f"    计算止盈失败: {e}")
+        
+        # 计算收益率（对全部信号向量化计算）
+        n = len(pullback_signals)
+        entries = np.fromiter((sig.get('entry_price', 0) for sig in pullback_signals),
+                              dtype=np.float64, count=n)
+        is_long = np.fromiter((sig.get('signal') == 'long' for sig in pullback_signals),
+                              dtype=bool, count=n)
+        tp = float(take_profit_price or 0)
+        valid = (entries > 0) & (tp > 0)
+        profit = np.where(is_long, tp - entries, entries - tp) / np.where(valid, entries, 1.0) * 100
+        profit = np.where(valid, np.round(profit, 2), 0.0)
+        
+        # 为信号添加止盈信息
+        for signal, profit_pct in zip(pullback_signals, profit.tolist()):
+            signal['timeframe'] = timeframe
+            signal['trend'] = trend
+            signal['take_profit_timeframe'] = take_profit_timeframe
+            signal['take_profit_price'] = take_profit_price
+            signal['profit_pct'] = profit_pct
+        
+        out.append(f"    {timeframe}: {len(pullback_signals)} 个信号")
+        
+        # 显示信号详情（日志级别不输出时跳过格式化）
+        if not logger.isEnabledFor(logging.INFO):
+            return len(pullback_signals)
+        for i, signal in enumerate(pullback_signals[:2]):  # 只显示前2个
+            profit = signal.get('profit_pct', 0)
+            out.append(f"      信号 {i+1}: {signal.get('signal')} EMA{signal.get('ema_period')} "
+                       f"入场:{signal.get('entry_price'):.2f} 止盈:{take_profit_price:.2f} "
+                       f"收益:{profit:.1f}%")
+        
+        return len(pullback_signals)
+    except Exception as e:
+        out.append(f"    {timeframe} 分析失败: {e}")
+        return 0
+    finally:
+        # 各时间框架并发执行，整段输出避免交错
+        logger.info("%s", "\n".join(out))
+
+
+def test_single_symbol(strategy: MultiTimeframeStrategy, symbol: str):
     """测试单个币种"""
     print(f"\n测试 {symbol}...")
     
-    strategy = MultiTimeframeStrategy()
     total_signals = 0
     
-    # 测试主要时间框架
+    # 测试主要时间框架（各时间框架互相独立，并发获取与计算）
     timeframes = ['4h', '8h', '12h', '1d']
     
-    for timeframe in timeframes:
-        try:
-            print(f"  分析 {timeframe} 时间框架...")
-            
-            # 获取数据
-            df = strategy.get_klines_data(symbol, timeframe, 100)
-            if df.empty:
-                print(f"    {symbol} {timeframe}: 无数据")
-                continue
-            
-            # 计算指标
-            df = strategy.calculate_emas(df)
-            df = strategy.calculate_bollinger_bands(df)
-            df.dropna(inplace=True)
-            
-            if df.empty:
-                print(f"    {symbol} {timeframe}: 计算指标后无数据")
-                continue
-            
-            # 判断趋势
-            is_bullish = strategy.is_bullish_trend(df)
-            is_bearish = strategy.is_bearish_trend(df)
-            trend = 'bullish' if is_bullish else 'bearish' if is_bearish else 'neutral'
-            
-            print(f"    趋势: {trend}")
-            
-            # 寻找信号
-            pullback_signals = strategy.find_ema_pullback_levels(df, trend)
-            
-            # 计算止盈
-            take_profit_timeframe = strategy.take_profit_timeframes.get(timeframe, '15m')
-            take_profit_price = None
-            
-            try:
-                tp_df = strategy.get_klines_data(symbol, take_profit_timeframe, 50)
-                if not tp_df.empty:
-                    tp_df = strategy.calculate_bollinger_bands(tp_df)
-                    tp_df.dropna(inplace=True)
-                    if not tp_df.empty:
-                        take_profit_price = tp_df['bb_middle'].iloc[-1]
-            except Exception as e:
-                print(f"    计算止盈失败: {e}")
-            
-            # 为信号添加止盈信息
-            for signal in pullback_signals:
-                signal['timeframe'] = timeframe
-                signal['trend'] = trend
-                signal['take_profit_timeframe'] = take_profit_timeframe
-                signal['take_profit_price'] = take_profit_price
-                
-                # 计算收益率
-                entry_price = signal.get('entry_price', 0)
-                if entry_price > 0 and take_profit_price and take_profit_price > 0:
-                    if signal.get('signal') == 'long':
-                        profit_pct = ((take_profit_price - entry_price) / entry_price) * 100
-                    else:
-                        profit_pct = ((entry_price - take_profit_price) / entry_price) * 100
-                    signal['profit_pct'] = round(profit_pct, 2)
-                else:
-                    signal['profit_pct'] = 0
-            
-            total_signals += len(pullback_signals)
-            print(f"    {timeframe}: {len(pullback_signals)} 个信号")
-            
-            # 显示信号详情
-            for i, signal in enumerate(pullback_signals[:2]):  # 只显示前2个
-                profit = signal.get('profit_pct', 0)
-                print(f"      信号 {i+1}: {signal.get('signal')} EMA{signal.get('ema_period')} "
-                      f"入场:{signal.get('entry_price'):.2f} 止盈:{take_profit_price:.2f} "
-                      f"收益:{profit:.1f}%")
-            
-        except Exception as e:
-            print(f"    {timeframe} 分析失败: {e}")
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = {executor.submit(_analyze_tf, strategy, symbol, tf): tf for tf in timeframes}
+        for future in as_completed(futures):
+            total_signals += future.result()
     
     return total_signals
 
+
+# 每个工作进程只创建一次策略实例，供该进程内所有币种复用（K线缓存也随之在进程内共享）
+_worker_strategy = None
+
+
+def _init_worker():
+    global _worker_strategy
+    _worker_strategy = MultiTimeframeStrategy()
+
+
+def _run_symbol(symbol: str) -> int:
+    return test_single_symbol(_worker_strategy, symbol)
+
 def main():
     """主函数"""
     print("=" * 60)
@@ -117,46 +148,56 @@ def main():
     
     all_results = []
     
-    for i, symbol in enumerate(test_symbols):
-        print(f"\n测试币种 {i+1}/{len(test_symbols)}: {symbol}")
+    # 各币种的指标计算是CPU密集型，使用多进程绕开GIL
+    with ProcessPoolExecutor(max_workers=min(len(test_symbols), os.cpu_count() or 1),
+                             initializer=_init_worker) as executor:
+        futures = [executor.submit(_run_symbol, symbol) for symbol in test_symbols]
         
-        try:
-            total_signals = test_single_symbol(symbol)
-            all_results.append({
-                'symbol': symbol,
-                'total_signals': total_signals
-            })
+        for i, (symbol, future) in enumerate(zip(test_symbols, futures)):
+            print(f"\n测试币种 {i+1}/{len(test_symbols)}: {symbol}")
             
-        except Exception as e:
-            print(f"测试 {symbol} 失败: {e}")
-            all_results.append({
-                'symbol': symbol,
-                'error': str(e),
-                'total_signals': 0
-            })
+            try:
+                total_signals = future.result()
+                all_results.append({
+                    'symbol': symbol,
+                    'total_signals': total_signals
+                })
+                
+            except Exception as e:
+                print(f"测试 {symbol} 失败: {e}")
+                all_results.append({
+                    'symbol': symbol,
+                    'error': str(e),
+                    'total_signals': 0
+                })
     
     # 计算总结
     total_signals = sum(r.get('total_signals', 0) for r in all_results)
     successful_symbols = len([r for r in all_results if r.get('total_signals', 0) > 0])
     
-    print("\n" + "=" * 60)
-    print("回测总结")
-    print("=" * 60)
-    print(f"测试币种数量: {len(test_symbols)}")
-    print(f"成功分析币种: {successful_symbols}")
-    print(f"总信号数量: {total_signals}")
+    out = [
+        "",
+        "=" * 60,
+        "回测总结",
+        "=" * 60,
+        f"测试币种数量: {len(test_symbols)}",
+        f"成功分析币种: {successful_symbols}",
+        f"总信号数量: {total_signals}",
+        "",
+        "各币种信号统计:",
+    ]
     
     # 显示每个币种的结果
-    print("\n各币种信号统计:")
     for result in all_results:
         symbol = result['symbol']
         total = result.get('total_signals', 0)
         if total > 0:
-            print(f"  {symbol}: {total} 个信号")
+            out.append(f"  {symbol}: {total} 个信号")
         else:
-            print(f"  {symbol}: 无信号")
+            out.append(f"  {symbol}: 无信号")
     
-    print("\n回测完成！")
+    out.append("\n回测完成！")
+    sys.stdout.write("\n".join(out) + "\n")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+离线测试指标计算（不访问交易所）
+检查趋势查找表与原有分支判断一致、numba内核与pandas结果一致
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+import indicators_numba
+from multi_timeframe_strategy import MultiTimeframeStrategy, NUMBA_AVAILABLE
+
+if NUMBA_AVAILABLE:
+    from multi_timeframe_strategy import _ema_multi
+
+
+def _legacy_trend_strength(ema89, ema144, ema233):
+    """查找表之前的判断方式：classify_trend 加 1.01/0.99 强度分支"""
+    if ema89 > ema144 > ema233:
+        return 'bullish', 'strong' if ema89 > ema144 * 1.01 else 'weak'
+    if ema89 < ema144 < ema233:
+        return 'bearish', 'strong' if ema89 < ema144 * 0.99 else 'weak'
+    return 'neutral', 'weak'
+
+
+def _trend_frame(ema89, ema144, ema233):
+    return pd.DataFrame({
+        'close': [100.0, 100.0],
+        'ema89': [100.0, ema89],
+        'ema144': [100.0, ema144],
+        'ema233': [100.0, ema233],
+    })
+
+
+def test_classify_trend_strength():
+    """多头/空头/中性（含强弱边界与NaN）与原有分支结果一致"""
+    strategy = MultiTimeframeStrategy()
+    cases = [
+        (103.0, 101.0, 100.0),   # 多头-强
+        (101.5, 101.0, 100.0),   # 多头-弱
+        (97.0, 99.0, 100.0),     # 空头-强
+        (98.5, 99.0, 100.0),     # 空头-弱
+        (101.0, 99.0, 100.0),    # 中性
+        (100.0, 100.0, 100.0),   # 持平
+        (np.nan, 101.0, 100.0),  # NaN
+    ]
+    rng = np.random.default_rng(0)
+    cases += [tuple(row) for row in rng.uniform(95.0, 105.0, size=(200, 3))]
+    for ema89, ema144, ema233 in cases:
+        df = _trend_frame(ema89, ema144, ema233)
+        expected = _legacy_trend_strength(ema89, ema144, ema233)
+        assert strategy.classify_trend_strength(df) == expected, (ema89, ema144, ema233)
+        assert strategy.classify_trend(df) == expected[0]
+
+
+def _random_closes(n=500, seed=1):
+    rng = np.random.default_rng(seed)
+    return 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, n)))
+
+
+def test_calculate_emas_matches_pandas():
+    """calculate_emas（安装numba时走 _ema_multi 内核）与 ewm(adjust=False) 一致"""
+    strategy = MultiTimeframeStrategy()
+    close = _random_closes()
+    for timeframe, periods in strategy.timeframe_ema_mapping.items():
+        df = strategy.calculate_emas(pd.DataFrame({'close': close}), timeframe)
+        for period in periods:
+            expected = pd.Series(close).ewm(span=period, adjust=False).mean().to_numpy()
+            np.testing.assert_allclose(df[f'ema{period}'].to_numpy(), expected, rtol=1e-10)
+
+
+def test_calculate_bollinger_bands_matches_pandas():
+    """calculate_bollinger_bands（安装numba时走 _bbands 内核）与 rolling().mean()/std() 一致"""
+    strategy = MultiTimeframeStrategy()
+    close = _random_closes()
+    df = strategy.calculate_bollinger_bands(pd.DataFrame({'close': close}), period=20, std=2)
+    rolling = pd.Series(close).rolling(window=20)
+    middle = rolling.mean().to_numpy()
+    band = rolling.std().to_numpy() * 2
+    np.testing.assert_allclose(df['bb_middle'].to_numpy(), middle, rtol=1e-10, equal_nan=True)
+    np.testing.assert_allclose(df['bb_upper'].to_numpy(), middle + band, rtol=1e-10, equal_nan=True)
+    np.testing.assert_allclose(df['bb_lower'].to_numpy(), middle - band, rtol=1e-10, equal_nan=True)
+
+    trimmed = strategy.calculate_bollinger_bands(pd.DataFrame({'close': close}), trim_warmup=True)
+    assert len(trimmed) == len(close) - 19
+    assert not trimmed['bb_middle'].isna().any()
+
+
+def test_kernels_accept_readonly_input():
+    """只读收盘价数组（如pandas写时复制返回的视图）同样可以调用内核"""
+    if not NUMBA_AVAILABLE:
+        return
+    close = _random_closes(100)
+    close.flags.writeable = False
+    alphas = np.array([2.0 / 22.0], dtype=np.float64)
+    out = np.empty((len(close), 1), dtype=np.float64)
+    _ema_multi(close, alphas, out)
+    expected = pd.Series(close).ewm(span=21, adjust=False).mean().to_numpy()
+    np.testing.assert_allclose(out[:, 0], expected, rtol=1e-10)
+
+
+def test_indicators_numba_matches_pandas():
+    """indicators_numba 的 ema / ema_last / sma 与 ewm(adjust=False) / rolling().mean() 一致"""
+    close = _random_closes()
+    for period in (12, 169, 200):
+        expected = pd.Series(close).ewm(span=period, adjust=False).mean().to_numpy()
+        np.testing.assert_allclose(indicators_numba.ema(close, period), expected, rtol=1e-10)
+        assert abs(indicators_numba.ema_last(close, period) - expected[-1]) <= 1e-10 * abs(expected[-1])
+    for window in (1, 20, 50):
+        expected = pd.Series(close).rolling(window=window).mean().to_numpy()
+        np.testing.assert_allclose(indicators_numba.sma(close, window), expected,
+                                   rtol=1e-10, equal_nan=True)
+
+    # 只读与非连续输入同样走内核
+    readonly = close.copy()
+    readonly.flags.writeable = False
+    np.testing.assert_allclose(indicators_numba.ema(readonly, 20), indicators_numba.ema(close, 20))
+    np.testing.assert_allclose(indicators_numba.sma(close[::2], 20),
+                               pd.Series(close[::2]).rolling(window=20).mean().to_numpy(),
+                               rtol=1e-10, equal_nan=True)
+
+
+def test_indicators_numba_nan_and_empty():
+    """含NaN时回退到pandas，结果与pandas完全一致；空输入返回空数组 / NaN"""
+    close = _random_closes(100)
+    close[[10, 55]] = np.nan
+    expected_ema = pd.Series(close).ewm(span=20, adjust=False).mean().to_numpy()
+    np.testing.assert_allclose(indicators_numba.ema(close, 20), expected_ema, rtol=1e-12)
+    assert abs(indicators_numba.ema_last(close, 20) - expected_ema[-1]) <= 1e-12 * abs(expected_ema[-1])
+    np.testing.assert_allclose(indicators_numba.sma(close, 20),
+                               pd.Series(close).rolling(window=20).mean().to_numpy(),
+                               rtol=1e-12, equal_nan=True)
+
+    empty = np.array([], dtype=np.float64)
+    assert indicators_numba.ema(empty, 20).shape == (0,)
+    assert indicators_numba.sma(empty, 20).shape == (0,)
+    assert np.isnan(indicators_numba.ema_last(empty, 20))
+
+
+def main():
+    tests = [value for name, value in sorted(globals().items()) if name.startswith('test_')]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,8 +8,44 @@ import requests
 import json
 import time
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from requests.adapters import HTTPAdapter
 from typing import Dict, List
 
+from testing_utils import json_dumps, json_loads
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """为未显式指定timeout的请求提供默认超时 (连接超时, 读取超时)"""
+    def __init__(self, *args, timeout=(5, 30), **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+    
+    def send(self, request, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = self.timeout
+        return super().send(request, timeout=timeout, **kwargs)
+
+def signal_cursor_key(signal: dict) -> list:
+    """按服务端 _signal_key 的9个字段计算信号的游标键（与 next_cursor 同形的列表）
+
+    测试中会校验第1页末尾信号的键等于服务端返回的 next_cursor，两边字段一旦不一致会直接报错
+    """
+    take_profit_price = signal.get('take_profit_price')
+    if take_profit_price is None:
+        take_profit_price = 0
+    return [
+        signal.get('symbol', ''),
+        signal.get('timeframe', ''),
+        signal.get('signal_type', ''),
+        round(signal.get('entry_price', 0), 6),
+        round(take_profit_price, 6),
+        round(signal.get('level', 0), 6),
+        signal.get('type', ''),
+        round(signal.get('distance', 0), 8),
+        round(signal.get('profit_pct', 0), 4)
+    ]
+
 class MultiTimeframeTestSuite:
     def __init__(self, base_url: str = "http://localhost:5000"):
         self.base_url = base_url
@@ -18,6 +54,14 @@ class MultiTimeframeTestSuite:
             'Content-Type': 'application/json',
             'User-Agent': 'MultiTimeframe-TestSuite/1.0'
         })
+        adapter = TimeoutHTTPAdapter(timeout=(5, 30))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # GET使用适配器默认超时；批量分析较慢，POST读取超时放宽到60秒
+        self.method_fns = {
+            'GET': self.session.get,
+            'POST': partial(self.session.post, timeout=(5, 60))
+        }
         self.test_results = []
         
     def log(self, message: str, level: str = "INFO"):
@@ -27,17 +71,15 @@ class MultiTimeframeTestSuite:
         
     def test_api_endpoint(self, endpoint: str, method: str = "GET", data: dict = None) -> tuple:
         """测试API端点"""
+        method_fn = self.method_fns.get(method)
+        if method_fn is None:
+            raise ValueError(f"Unsupported HTTP method: {method}")
+        
         try:
             url = f"{self.base_url}{endpoint}"
-            
-            if method == "GET":
-                response = self.session.get(url, timeout=30)
-            elif method == "POST":
-                response = self.session.post(url, json=data, timeout=60)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-                
-            return True, response.status_code, response.json()
+            # 请求体预先序列化（Content-Type已在session上设置）
+            response = method_fn(url) if data is None else method_fn(url, data=json_dumps(data))
+            return True, response.status_code, json_loads(response.content)
         except requests.exceptions.Timeout:
             return False, 408, {"error": "Request timeout"}
         except requests.exceptions.RequestException as e:
@@ -137,17 +179,21 @@ class MultiTimeframeTestSuite:
         return len(signals) >= 0  # 允许0个信号，因为可能没有满足条件的
     
     def test_pagination_logic(self, symbols: List[str]) -> bool:
-        """测试分页逻辑"""
+        """测试分页逻辑（游标分页：第1页返回next_cursor，第2页从该游标继续）
+
+        注意：游标模式下服务端每次请求仍会重新分析并排序全部信号，
+        游标只省去按页码跳过前面信号的切片，并不是每页O(1)的分页
+        """
         test_symbols = symbols[:5]  # 使用5个币种测试
         self.log(f"测试分页逻辑: {test_symbols}...")
         
-        # 测试第1页
+        # 测试第1页（cursor为null表示从头开始）
         success1, status1, data1 = self.test_api_endpoint(
             '/multi_timeframe/analyze_multiple_symbols',
             'POST',
             {
                 'symbols': test_symbols,
-                'page': 1,
+                'cursor': None,
                 'page_size': 10  # 每页10个信号
             }
         )
@@ -159,14 +205,25 @@ class MultiTimeframeTestSuite:
         signals_page1 = data1.get('signals', [])
         pagination1 = data1.get('pagination', {})
         
-        # 如果有多页，测试第2页
-        if pagination1.get('total_pages', 0) > 1:
+        if 'next_cursor' not in pagination1:
+            self.log("服务端未返回next_cursor，不支持游标分页", "ERROR")
+            return False
+        
+        cursor = pagination1['next_cursor']
+        
+        # 客户端键必须与服务端分页使用的键一致，否则下面的顺序检查没有意义
+        if cursor and signals_page1 and signal_cursor_key(signals_page1[-1]) != cursor:
+            self.log(f"客户端游标键与服务端next_cursor不一致: {signal_cursor_key(signals_page1[-1])} != {cursor}", "ERROR")
+            return False
+        
+        # 如果有下一页，用游标测试第2页
+        if cursor:
             success2, status2, data2 = self.test_api_endpoint(
                 '/multi_timeframe/analyze_multiple_symbols',
                 'POST',
                 {
                     'symbols': test_symbols,
-                    'page': 2,
+                    'cursor': cursor,
                     'page_size': 10
                 }
             )
@@ -175,11 +232,15 @@ class MultiTimeframeTestSuite:
                 signals_page2 = data2.get('signals', [])
                 self.log(f"分页测试: 第1页{len(signals_page1)}个信号, 第2页{len(signals_page2)}个信号")
                 
-                # 检查信号是否不重复
-                signal_ids_1 = set(f"{s.get('symbol', '')}-{s.get('timeframe', '')}-{s.get('entry_price', 0)}" for s in signals_page1)
-                signal_ids_2 = set(f"{s.get('symbol', '')}-{s.get('timeframe', '')}-{s.get('entry_price', 0)}" for s in signals_page2)
+                # 第2页首个信号的游标键必须严格大于第1页返回的next_cursor
+                if signals_page2 and signal_cursor_key(signals_page2[0]) <= cursor:
+                    self.log("游标分页顺序错误: 第2页未从第1页末尾之后开始", "ERROR")
+                    return False
                 
-                overlap = signal_ids_1 & signal_ids_2
+                # 检查信号是否不重复（元组键，一次遍历第2页）
+                seen = {(s.get('symbol', ''), s.get('timeframe', ''), s.get('entry_price', 0)) for s in signals_page1}
+                overlap = [s for s in signals_page2
+                           if (s.get('symbol', ''), s.get('timeframe', ''), s.get('entry_price', 0)) in seen]
                 if overlap:
                     self.log(f"分页重复信号检测到: {len(overlap)} 个重复", "WARNING")
                 else:
@@ -187,7 +248,39 @@ class MultiTimeframeTestSuite:
             else:
                 self.log("第2页测试失败", "WARNING")
         
-        self.log(f"分页逻辑测试完成: 总页数 {pagination1.get('total_pages', 'N/A')}")
+        # 沿next_cursor连续翻页，比较整次请求耗时（含服务端分析与分页）：后面的页不应明显变慢
+        timings = []
+        walk_cursor = None
+        for _ in range(5):
+            start = time.perf_counter()
+            success_p, status_p, data_p = self.test_api_endpoint(
+                '/multi_timeframe/analyze_multiple_symbols',
+                'POST',
+                {
+                    'symbols': test_symbols,
+                    'cursor': walk_cursor,
+                    'page_size': 5
+                }
+            )
+            timings.append((time.perf_counter() - start) * 1000)
+            
+            if not success_p or status_p != 200:
+                self.log(f"第{len(timings)}页耗时测试失败", "ERROR")
+                return False
+            
+            walk_cursor = data_p.get('pagination', {}).get('next_cursor')
+            if not walk_cursor:
+                break
+        
+        self.log("分页耗时: " + ", ".join(f"第{i}页 {ms:.1f}ms" for i, ms in enumerate(timings, 1)))
+        if len(timings) < 2:
+            self.log("信号不足两页，跳过翻页耗时比较", "WARNING")
+        # 每次请求都包含完整分析，给50ms的绝对下限避免计时抖动误报
+        elif timings[-1] >= max(timings[0] * 3, 50.0):
+            self.log("翻页耗时随页数明显增长", "ERROR")
+            return False
+        
+        self.log(f"分页逻辑测试完成: 总页数 {pagination1.get('total_pages', 'N/A')}, next_cursor={cursor}")
         return True
     
     def test_error_handling(self) -> bool:
@@ -248,32 +341,38 @@ class MultiTimeframeTestSuite:
         self.log("开始运行多时间框架模块测试套件...")
         self.log("=" * 60)
         
-        # 1. 测试获取币种
-        symbols = self.test_get_symbols()
-        if not symbols:
-            self.log("基础测试失败，终止后续测试", "ERROR")
-            return False
-            
-        # 2. 测试策略信息
-        if not self.test_strategy_info():
-            self.log("策略信息测试失败", "WARNING")
+        # 获取币种、策略信息、错误处理三项互不依赖，并发执行（共用session连接池）
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            symbols_future = executor.submit(self.test_get_symbols)
+            info_future = executor.submit(self.test_strategy_info)
+            error_future = executor.submit(self.test_error_handling)
             
-        # 3. 测试单币种分析
-        if symbols and not self.test_single_symbol_analysis(symbols[0]):
-            self.log("单币种分析测试失败", "WARNING")
-            
-        # 4. 测试小批量分析
-        if not self.test_batch_analysis_small(symbols):
-            self.log("批量分析测试失败，检查是否需要优化", "WARNING")
-            
-        # 5. 测试分页逻辑
-        if not self.test_pagination_logic(symbols):
-            self.log("分页逻辑测试失败", "ERROR")
-            return False
-            
-        # 6. 测试错误处理
-        if not self.test_error_handling():
-            self.log("错误处理测试失败", "WARNING")
+            # 1. 测试获取币种
+            symbols = symbols_future.result()
+            if not symbols:
+                self.log("基础测试失败，终止后续测试", "ERROR")
+                return False
+                
+            # 2. 测试策略信息
+            if not info_future.result():
+                self.log("策略信息测试失败", "WARNING")
+                
+            # 3. 测试单币种分析（以下依赖币种列表，按顺序执行）
+            if symbols and not self.test_single_symbol_analysis(symbols[0]):
+                self.log("单币种分析测试失败", "WARNING")
+                
+            # 4. 测试小批量分析
+            if not self.test_batch_analysis_small(symbols):
+                self.log("批量分析测试失败，检查是否需要优化", "WARNING")
+                
+            # 5. 测试分页逻辑
+            if not self.test_pagination_logic(symbols):
+                self.log("分页逻辑测试失败", "ERROR")
+                return False
+                
+            # 6. 测试错误处理
+            if not error_future.result():
+                self.log("错误处理测试失败", "WARNING")
             
         self.log("=" * 60)
         self.log("所有测试完成！")
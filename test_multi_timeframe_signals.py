@@ -16,14 +16,24 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from multi_timeframe_strategy import MultiTimeframeStrategy
 
+# 各测试函数共用一个策略实例，单币种分析结果在本次运行内缓存复用
+_STRATEGY = MultiTimeframeStrategy()
+_analysis_cache = {}
+
+
+def _cached_analyze(symbol):
+    """返回 analyze_symbol 的结果，同一币种只分析一次"""
+    if symbol not in _analysis_cache:
+        _analysis_cache[symbol] = _STRATEGY.analyze_symbol(symbol)
+    return _analysis_cache[symbol]
+
+
 def test_single_symbol():
     """测试单个币种信号生成"""
     print("=" * 60)
     print("测试单个币种信号生成")
     print("=" * 60)
     
-    strategy = MultiTimeframeStrategy()
-    
     # 测试币种列表
     test_symbols = ['BTCUSDT', 'ETHUSDT', 'SOLUSDT', 'ADAUSDT']
     
@@ -33,7 +43,7 @@ def test_single_symbol():
         
         try:
             start_time = time.time()
-            result = strategy.analyze_symbol(symbol)
+            result = _cached_analyze(symbol)
             end_time = time.time()
             
             print(f"✅ 分析完成，耗时: {end_time - start_time:.2f}秒")
@@ -73,8 +83,6 @@ def test_multiple_symbols():
     print("测试多个币种批量分析")
     print("=" * 60)
     
-    strategy = MultiTimeframeStrategy()
-    
     # 测试币种列表
     test_symbols = ['BTCUSDT', 'ETHUSDT', 'SOLUSDT', 'ADAUSDT', 'DOTUSDT']
     
@@ -83,7 +91,7 @@ def test_multiple_symbols():
     
     try:
         start_time = time.time()
-        results = strategy.analyze_multiple_symbols(test_symbols)
+        results = _STRATEGY.analyze_multiple_symbols(test_symbols)
         end_time = time.time()
         
         print(f"✅ 批量分析完成，耗时: {end_time - start_time:.2f}秒")
@@ -134,14 +142,12 @@ def test_signal_data_format():
     print("测试信号数据格式和完整性")
     print("=" * 60)
     
-    strategy = MultiTimeframeStrategy()
-    
     # 测试一个币种
     symbol = 'BTCUSDT'
     print(f"🔍 测试币种: {symbol}")
     
     try:
-        result = strategy.analyze_symbol(symbol)
+        result = _cached_analyze(symbol)
         
         # 检查数据结构
         required_keys = ['symbol', 'results', 'total_timeframes', 'successful_timeframes']
@@ -6,30 +6,54 @@
 
 import sys
 import os
+import csv
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import time
 import logging
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from multi_timeframe_strategy import MultiTimeframeStrategy
+from testing_utils import json_loads
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# 复用同一个会话（连接池 + keep-alive），避免每次请求重新握手
+# 429/5xx 由Retry按Retry-After退避重试，避免瞬时限流导致信号丢失
+_session = requests.Session()
+_session.headers.update({'User-Agent': 'Mozilla/5.0', 'Accept-Encoding': 'gzip'})
+_retry = Retry(
+    total=3,
+    backoff_factor=0.3,
+    status_forcelist=(429, 500, 502, 503, 504),
+    respect_retry_after_header=True
+)
+_session.mount('https://', HTTPAdapter(pool_connections=20, pool_maxsize=20, max_retries=_retry))
+
+# 修改策略实例在模块级创建一次
+_MODIFIED_STRATEGY = MultiTimeframeStrategy('modified')
+
+RESULTS_CSV = 'new_strategy_test_results.csv'
+RESULT_FIELDS = [
+    'symbol', 'timeframe', 'signal_type', 'ema_period', 'entry_price',
+    'take_profit_price', 'profit_pct', 'signal_time', 'condition'
+]
+
 def get_gate_top_symbols(limit=10):
     """获取GATE.IO前10个币种（快速测试）"""
     try:
-        import requests
-        
         url = "https://api.gateio.ws/api/v4/spot/tickers"
-        response = requests.get(url, timeout=10)
+        response = _session.get(url, timeout=10)
         
         if response.status_code == 200:
-            data = response.json()
+            data = json_loads(response.content)
             usdt_pairs = [t for t in data if t['currency_pair'].endswith('_USDT')]
             usdt_pairs.sort(key=lambda x: float(x.get('base_volume', 0)), reverse=True)
             
@@ -47,8 +71,6 @@ def get_gate_top_symbols(limit=10):
 def get_historical_data(symbol, timeframe='1d', days=30):
     """获取历史数据"""
     try:
-        import requests
-        
         # 计算时间范围
         end_time = datetime.now()
         start_time = end_time - timedelta(days=days)
@@ -64,19 +86,31 @@ def get_historical_data(symbol, timeframe='1d', days=30):
             'to': end_ts
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        response = _session.get(url, params=params, timeout=10)
         
         if response.status_code == 200:
-            data = response.json()
+            data = json_loads(response.content)
             if data and len(data) > 0:
-                df = pd.DataFrame(data, columns=['timestamp', 'volume', 'close', 'high', 'low', 'open'])
-                df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
-                df = df.sort_values('timestamp').reset_index(drop=True)
-                
-                for col in ['open', 'high', 'low', 'close', 'volume']:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
+                # Gate.IO K线字段: [时间戳, 成交额, 收盘, 最高, 最低, 开盘, ...]
+                # 一次性转换为float64，非有限值的行直接剔除
+                ts = np.fromiter((int(row[0]) for row in data), dtype=np.int64, count=len(data))
+                arr = np.asarray(data, dtype=object)
+                values = arr[:, [5, 3, 4, 2, 1]].astype(np.float64)
+                valid = np.isfinite(values).all(axis=1)
+                values = values[valid]
                 
-                df = df.dropna()
+                # 直接用已类型化的列构建DataFrame
+                df = pd.DataFrame({
+                    'timestamp': pd.to_datetime(ts[valid], unit='s'),
+                    'open': values[:, 0],
+                    'high': values[:, 1],
+                    'low': values[:, 2],
+                    'close': values[:, 3],
+                    'volume': values[:, 4]
+                })
+                # Gate.IO按时间升序返回，仅在乱序时才排序
+                if not df['timestamp'].is_monotonic_increasing:
+                    df = df.sort_values('timestamp').reset_index(drop=True)
                 return df
             else:
                 return pd.DataFrame()
@@ -86,14 +120,115 @@ def get_historical_data(symbol, timeframe='1d', days=30):
     except Exception as e:
         return pd.DataFrame()
 
+def prefetch_historical_data(symbols, timeframes, days=30, max_workers=10):
+    """并发获取所有(币种, 时间框架)的历史数据，返回 {(symbol, timeframe): DataFrame}"""
+    data = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        future_to_key = {
+            executor.submit(get_historical_data, symbol, tf, days): (symbol, tf)
+            for symbol in symbols for tf in timeframes
+        }
+        for future in as_completed(future_to_key):
+            data[future_to_key[future]] = future.result()
+    logger.info(f"预取历史数据完成: {len(data)} 组")
+    return data
+
+def analyze_symbol_signals(modified_strategy, symbol, klines, take_profit_tf, header):
+    """分析单个币种的全部时间框架，返回该币种的信号结果列表"""
+    records = []
+    # 该币种的info日志先缓冲，结束时一次性输出
+    log_buf = [header]
+    
+    try:
+        # 止盈统一使用1分钟布林中轨：每个币种只计算一次，供所有时间框架的信号复用
+        bb_middle = None
+        tp_df = klines.get((symbol, take_profit_tf), pd.DataFrame()).copy()
+        if not tp_df.empty:
+            tp_df = modified_strategy.calculate_bollinger_bands(tp_df).dropna()
+            if not tp_df.empty:
+                bb_middle = tp_df['bb_middle'].iloc[-1]
+        
+        # 分析每个时间框架
+        for tf in modified_strategy.timeframes:
+            log_buf.append(f"  分析时间框架: {tf}")
+            
+            try:
+                # 获取数据
+                df = klines.get((symbol, tf), pd.DataFrame())
+                if df.empty or len(df) < 50:
+                    logger.warning(f"    {symbol} {tf}数据不足")
+                    continue
+                
+                # 计算技术指标
+                df = modified_strategy.calculate_emas(df, tf)
+                df = modified_strategy.calculate_bollinger_bands(df)
+                df = df.dropna()
+                
+                if df.empty:
+                    logger.warning(f"    {symbol} {tf}计算指标后数据为空")
+                    continue
+                
+                # 判断趋势（一次读取最新EMA值）
+                trend = modified_strategy.classify_trend(df)
+                if trend == 'bullish':
+                    log_buf.append(f"    {symbol} {tf}: 多头趋势")
+                elif trend == 'bearish':
+                    log_buf.append(f"    {symbol} {tf}: 空头趋势")
+                else:
+                    log_buf.append(f"    {symbol} {tf}: 中性趋势")
+                    continue
+                
+                # 寻找信号
+                signals = modified_strategy.find_ema_pullback_levels(df, trend, tf, symbol)
+                
+                if signals:
+                    log_buf.append(f"    {symbol} {tf}: 找到{len(signals)}个信号")
+                    
+                    if bb_middle is not None:
+                        for signal in signals:
+                            entry_price = signal['entry_price']
+                            
+                            # 计算收益率
+                            if signal['signal'] == 'long':
+                                profit_pct = (bb_middle - entry_price) / entry_price * 100
+                            else:
+                                profit_pct = (entry_price - bb_middle) / entry_price * 100
+                            
+                            records.append({
+                                'symbol': symbol,
+                                'timeframe': tf,
+                                'signal_type': signal['signal'],
+                                'ema_period': signal['ema_period'],
+                                'entry_price': entry_price,
+                                'take_profit_price': bb_middle,
+                                'profit_pct': profit_pct,
+                                'signal_time': signal['signal_time'],
+                                'condition': signal['condition']
+                            })
+                            
+                            log_buf.append(f"      {signal['signal']} EMA{signal['ema_period']} 收益率: {profit_pct:.2f}%")
+                else:
+                    log_buf.append(f"    {symbol} {tf}: 无信号")
+                
+            except Exception as e:
+                logger.error(f"    {symbol} {tf}分析失败: {e}")
+                continue
+        
+    except Exception as e:
+        logger.error(f"分析{symbol}失败: {e}")
+    finally:
+        logger.info("\n".join(log_buf))
+    
+    return records
+
 def test_new_strategy():
     """测试新策略"""
     logger.info("=" * 60)
     logger.info("测试新策略（修改策略）")
     logger.info("=" * 60)
     
-    # 创建修改策略实例
-    modified_strategy = MultiTimeframeStrategy('modified')
+    # 修改策略实例
+    modified_strategy = _MODIFIED_STRATEGY
     
     logger.info(f"新策略时间框架: {modified_strategy.timeframes}")
     logger.info(f"新策略止盈配置: {modified_strategy.take_profit_timeframes}")
@@ -106,96 +241,31 @@ def test_new_strategy():
     
     logger.info(f"测试币种: {symbols}")
     
+    # 一次性并发获取全部K线（含止盈用的1分钟数据），线程数限制即为请求并发上限
+    take_profit_tf = '1m'  # 新策略统一使用1分钟
+    klines = prefetch_historical_data(symbols, modified_strategy.timeframes + [take_profit_tf])
+    
     results = []
-    total_signals = 0
     
-    # 测试每个币种
-    for i, symbol in enumerate(symbols):
-        logger.info(f"\n分析币种 {i+1}/{len(symbols)}: {symbol}")
+    with open(RESULTS_CSV, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
         
-        try:
-            # 分析每个时间框架
-            for tf in modified_strategy.timeframes:
-                logger.info(f"  分析时间框架: {tf}")
-                
-                try:
-                    # 获取数据
-                    df = get_historical_data(symbol, tf, days=30)
-                    if df.empty or len(df) < 50:
-                        logger.warning(f"    {symbol} {tf}数据不足")
-                        continue
-                    
-                    # 计算技术指标
-                    df = modified_strategy.calculate_emas(df, tf)
-                    df = modified_strategy.calculate_bollinger_bands(df)
-                    df = df.dropna()
-                    
-                    if df.empty:
-                        logger.warning(f"    {symbol} {tf}计算指标后数据为空")
-                        continue
-                    
-                    # 判断趋势
-                    if modified_strategy.is_bullish_trend(df):
-                        trend = 'bullish'
-                        logger.info(f"    {symbol} {tf}: 多头趋势")
-                    elif modified_strategy.is_bearish_trend(df):
-                        trend = 'bearish'
-                        logger.info(f"    {symbol} {tf}: 空头趋势")
-                    else:
-                        logger.info(f"    {symbol} {tf}: 中性趋势")
-                        continue
-                    
-                    # 寻找信号
-                    signals = modified_strategy.find_ema_pullback_levels(df, trend, tf, symbol)
-                    
-                    if signals:
-                        logger.info(f"    {symbol} {tf}: 找到{len(signals)}个信号")
-                        for signal in signals:
-                            # 计算止盈（统一使用1分钟布林中轨）
-                            take_profit_tf = '1m'  # 新策略统一使用1分钟
-                            tp_df = get_historical_data(symbol, take_profit_tf, days=30)
-                            
-                            if not tp_df.empty:
-                                tp_df = modified_strategy.calculate_bollinger_bands(tp_df)
-                                tp_df = tp_df.dropna()
-                                
-                                if not tp_df.empty:
-                                    bb_middle = tp_df['bb_middle'].iloc[-1]
-                                    entry_price = signal['entry_price']
-                                    
-                                    # 计算收益率
-                                    if signal['signal'] == 'long':
-                                        profit_pct = (bb_middle - entry_price) / entry_price * 100
-                                    else:
-                                        profit_pct = (entry_price - bb_middle) / entry_price * 100
-                                    
-                                    results.append({
-                                        'symbol': symbol,
-                                        'timeframe': tf,
-                                        'signal_type': signal['signal'],
-                                        'ema_period': signal['ema_period'],
-                                        'entry_price': entry_price,
-                                        'take_profit_price': bb_middle,
-                                        'profit_pct': profit_pct,
-                                        'signal_time': signal['signal_time'],
-                                        'condition': signal['condition']
-                                    })
-                                    
-                                    total_signals += 1
-                                    logger.info(f"      {signal['signal']} EMA{signal['ema_period']} 收益率: {profit_pct:.2f}%")
-                    else:
-                        logger.info(f"    {symbol} {tf}: 无信号")
-                    
-                    # 添加延迟
-                    time.sleep(0.1)
-                    
-                except Exception as e:
-                    logger.error(f"    {symbol} {tf}分析失败: {e}")
-                    continue
-            
-        except Exception as e:
-            logger.error(f"分析{symbol}失败: {e}")
-            continue
+        # 各币种的指标计算互相独立，用线程池并发执行（最多8个线程）
+        with ThreadPoolExecutor(max_workers=min(8, len(symbols))) as executor:
+            futures = [
+                executor.submit(analyze_symbol_signals, modified_strategy, symbol, klines, take_profit_tf,
+                                f"\n分析币种 {i+1}/{len(symbols)}: {symbol}")
+                for i, symbol in enumerate(symbols)
+            ]
+            # 按币种顺序逐个写入CSV，中途出错时已完成的结果不会丢失
+            for future in futures:
+                records = future.result()
+                writer.writerows(records)
+                f.flush()
+                results.extend(records)
+    
+    total_signals = len(results)
     
     # 分析结果
     logger.info("\n" + "=" * 60)
@@ -204,40 +274,29 @@ def test_new_strategy():
     
     logger.info(f"总信号数: {total_signals}")
     if results:
-        profits = [r['profit_pct'] for r in results]
-        logger.info(f"平均收益率: {np.mean(profits):.2f}%")
-        logger.info(f"最大收益率: {np.max(profits):.2f}%")
-        logger.info(f"最小收益率: {np.min(profits):.2f}%")
-        logger.info(f"正收益信号: {sum(1 for p in profits if p > 0)}/{len(profits)}")
+        # 统计用DataFrame
+        results_df = pd.DataFrame(results)
+        profits = results_df['profit_pct'].to_numpy()
+        logger.info(f"平均收益率: {profits.mean():.2f}%")
+        logger.info(f"最大收益率: {profits.max():.2f}%")
+        logger.info(f"最小收益率: {profits.min():.2f}%")
+        logger.info(f"正收益信号: {int((profits > 0).sum())}/{len(profits)}")
         
         # 按时间框架统计
-        tf_stats = {}
-        for result in results:
-            tf = result['timeframe']
-            if tf not in tf_stats:
-                tf_stats[tf] = []
-            tf_stats[tf].append(result['profit_pct'])
+        tf_stats = results_df.groupby('timeframe', sort=False)['profit_pct'].agg(['size', 'mean'])
         
         logger.info("\n按时间框架统计:")
-        for tf, tf_profits in tf_stats.items():
-            logger.info(f"  {tf}: {len(tf_profits)}个信号, 平均收益率: {np.mean(tf_profits):.2f}%")
+        for tf, count, mean in tf_stats.itertuples():
+            logger.info(f"  {tf}: {count}个信号, 平均收益率: {mean:.2f}%")
         
         # 按EMA周期统计
-        ema_stats = {}
-        for result in results:
-            ema = result['ema_period']
-            if ema not in ema_stats:
-                ema_stats[ema] = []
-            ema_stats[ema].append(result['profit_pct'])
+        ema_stats = results_df.groupby('ema_period', sort=False)['profit_pct'].agg(['size', 'mean'])
         
         logger.info("\n按EMA周期统计:")
-        for ema, ema_profits in ema_stats.items():
-            logger.info(f"  EMA{ema}: {len(ema_profits)}个信号, 平均收益率: {np.mean(ema_profits):.2f}%")
+        for ema, count, mean in ema_stats.itertuples():
+            logger.info(f"  EMA{ema}: {count}个信号, 平均收益率: {mean:.2f}%")
         
-        # 保存结果
-        results_df = pd.DataFrame(results)
-        results_df.to_csv('new_strategy_test_results.csv', index=False, encoding='utf-8-sig')
-        logger.info(f"\n结果已保存到: new_strategy_test_results.csv")
+        logger.info(f"\n结果已保存到: {RESULTS_CSV}")
         
         # 显示详细结果
         logger.info("\n详细信号列表:")
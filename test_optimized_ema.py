@@ -8,7 +8,42 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from multi_timeframe_strategy import MultiTimeframeStrategy
+import pandas as pd
+
+from multi_timeframe_strategy import MultiTimeframeStrategy, KLINES_DISK_CACHE_DIR
+
+def test_klines_negative_cache():
+    """无数据的组合第二次获取直接命中负缓存，不再请求交易所（不访问网络）"""
+    strategy = MultiTimeframeStrategy()
+    fetch_calls = []
+    
+    def empty_fetch(symbol, interval, limit=1000):
+        fetch_calls.append((symbol, interval, limit))
+        return pd.DataFrame()
+    
+    strategy._fetch_klines_data = empty_fetch
+    
+    # 默认关闭：数据源故障同样返回空结果，不能据此屏蔽该组合
+    strategy.get_klines_data('NODATAUSDT', '4h', 100)
+    strategy.get_klines_data('NODATAUSDT', '4h', 100)
+    assert len(fetch_calls) == 2, f"默认不应启用负缓存: {fetch_calls}"
+    assert not strategy.is_klines_known_empty('NODATAUSDT', '4h', 100)
+    
+    fetch_calls.clear()
+    strategy.kline_empty_cache_enabled = True
+    assert not strategy.is_klines_known_empty('NODATAUSDT', '4h', 100)
+    assert strategy.get_klines_data('NODATAUSDT', '4h', 100).empty
+    assert strategy.is_klines_known_empty('NODATAUSDT', '4h', 100)
+    assert strategy.get_klines_data('NODATAUSDT', '4h', 100).empty
+    assert len(fetch_calls) == 1, f"第二次获取不应再请求交易所: {fetch_calls}"
+    
+    # 负缓存过期后重新请求
+    strategy.kline_empty_ttl = 0
+    assert not strategy.is_klines_known_empty('NODATAUSDT', '4h', 100)
+    strategy.get_klines_data('NODATAUSDT', '4h', 100)
+    assert len(fetch_calls) == 2
+    print("负缓存测试通过: 无数据组合只请求一次")
+
 
 def test_optimized_ema_config():
     """测试优化后的EMA配置"""
@@ -17,6 +52,8 @@ def test_optimized_ema_config():
     print("=" * 60)
     
     strategy = MultiTimeframeStrategy()
+    strategy.kline_disk_cache_dir = KLINES_DISK_CACHE_DIR  # 多次运行复用已获取的K线
+    strategy.kline_empty_cache_enabled = True  # 本次运行内无数据的组合只请求一次
     
     # 显示时间框架对应的EMA组合
     print("时间框架对应的EMA组合:")
@@ -43,8 +80,7 @@ def test_optimized_ema_config():
             
             # 计算指标
             df = strategy.calculate_emas(df, timeframe)
-            df = strategy.calculate_bollinger_bands(df)
-            df.dropna(inplace=True)
+            df = strategy.calculate_bollinger_bands(df, trim_warmup=True)
             
             if df.empty:
                 print(f"  计算指标后无数据")
@@ -62,9 +98,7 @@ def test_optimized_ema_config():
                     print(f"    EMA{period}: {ema_value:.4f}")
             
             # 判断趋势
-            is_bullish = strategy.is_bullish_trend(df)
-            is_bearish = strategy.is_bearish_trend(df)
-            trend = 'bullish' if is_bullish else 'bearish' if is_bearish else 'neutral'
+            trend = strategy.classify_trend(df)
             
             # 寻找信号
             pullback_signals = strategy.find_ema_pullback_levels(df, trend, timeframe)
@@ -85,4 +119,5 @@ def test_optimized_ema_config():
     print("=" * 60)
 
 if __name__ == "__main__":
+    test_klines_negative_cache()
     test_optimized_ema_config()
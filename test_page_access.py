@@ -6,17 +6,35 @@
 import requests
 import time
 
+from testing_utils import session as _session
+
+def wait_ready(url='http://localhost:5000/health', timeout=3.0):
+    """轮询健康检查直到应用就绪（指数退避，最长等待timeout秒）；应用已启动时立即返回"""
+    start = time.monotonic()
+    delay = 0.05
+    while time.monotonic() - start < timeout:
+        try:
+            # 直接请求而不走会话的重试适配器，探测失败时尽快进入下一轮
+            if requests.get(url, timeout=0.5).status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(delay)
+        delay = min(delay * 1.5, 0.25)
+    return False
+
 def test_page_access():
     """测试页面访问"""
     print("=== 测试页面访问 ===")
     
     # 等待应用启动
     print("等待应用启动...")
-    time.sleep(3)
+    if not wait_ready():
+        print("⚠️ 等待应用启动超时，继续测试")
     
     # 测试主页
     try:
-        response = requests.get('http://localhost:5000/', timeout=5)
+        response = _session.get('http://localhost:5000/', timeout=5)
         if response.status_code == 200:
             print("✅ 主页访问正常")
         else:
@@ -26,7 +44,7 @@ def test_page_access():
     
     # 测试多时间框架测试页面
     try:
-        response = requests.get('http://localhost:5000/test_multi_timeframe.html', timeout=5)
+        response = _session.get('http://localhost:5000/test_multi_timeframe.html', timeout=5)
         if response.status_code == 200:
             print("✅ 多时间框架测试页面访问正常")
             print(f"页面大小: {len(response.text)} 字符")
@@ -37,7 +55,7 @@ def test_page_access():
     
     # 测试健康检查
     try:
-        response = requests.get('http://localhost:5000/health', timeout=5)
+        response = _session.get('http://localhost:5000/health', timeout=5)
         if response.status_code == 200:
             data = response.json()
             print(f"✅ 健康检查正常: {data['status']}")
@@ -47,5 +65,8 @@ def test_page_access():
         print(f"❌ 健康检查失败: {e}")
 
 if __name__ == "__main__":
-    test_page_access()
+    try:
+        test_page_access()
+    finally:
+        _session.close()
 
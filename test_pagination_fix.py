@@ -4,9 +4,15 @@
 测试前端分页功能是否正常工作
 """
 
-import requests
-import json
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+from testing_utils import session as _session, json_loads
+
+
+def signal_fingerprint(signal):
+    """信号的去重键：（币种、时间框架、入场价）原值元组，低价币的入场价不会被取整合并"""
+    return (signal.get('symbol'), signal.get('timeframe'), signal.get('entry_price'))
 
 def test_pagination_fix():
     """测试分页修复"""
@@ -17,8 +23,8 @@ def test_pagination_fix():
     try:
         # 1. 获取少量币种进行测试
         print("1. 获取测试币种...")
-        response = requests.get(f"{base_url}/multi_timeframe/get_top_symbols")
-        data = response.json()
+        response = _session.get(f"{base_url}/multi_timeframe/get_top_symbols")
+        data = json_loads(response.content)
         
         if not data['success']:
             print(f"[FAIL] 获取币种失败: {data.get('error')}")
@@ -27,15 +33,25 @@ def test_pagination_fix():
         test_symbols = data['symbols'][:5]  # 只取前5个币种
         print(f"[PASS] 获取到测试币种: {test_symbols}")
         
+        def fetch_page(page):
+            """请求指定页（每页10个信号，确保会有多页）"""
+            response = _session.post(f"{base_url}/multi_timeframe/analyze_multiple_symbols", 
+                                   json={
+                                       'symbols': test_symbols,
+                                       'page': page,
+                                       'page_size': 10
+                                   })
+            return json_loads(response.content)
+        
+        # 第1页与超大页码互不依赖，并发请求；第2页仅在有多页时再请求
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            page1_future = executor.submit(fetch_page, 1)
+            page999_future = executor.submit(fetch_page, 999)  # 超大页码
+            data = page1_future.result()
+            data999 = page999_future.result()
+        
         # 2. 测试多页信号生成
         print("\n2. 测试分页信号生成...")
-        response = requests.post(f"{base_url}/multi_timeframe/analyze_multiple_symbols", 
-                               json={
-                                   'symbols': test_symbols,
-                                   'page': 1,
-                                   'page_size': 10  # 每页10个信号，确保会有多页
-                               })
-        data = response.json()
         
         if not data['success']:
             print(f"[FAIL] 分析失败: {data.get('error')}")
@@ -51,13 +67,7 @@ def test_pagination_fix():
         # 3. 测试第2页（如果存在）
         if pagination.get('total_pages', 0) > 1:
             print("\n3. 测试第2页...")
-            response = requests.post(f"{base_url}/multi_timeframe/analyze_multiple_symbols", 
-                                   json={
-                                       'symbols': test_symbols,
-                                       'page': 2,
-                                       'page_size': 10
-                                   })
-            data2 = response.json()
+            data2 = fetch_page(2)
             
             if data2['success']:
                 signals2 = data2.get('signals', [])
@@ -67,8 +77,8 @@ def test_pagination_fix():
                 print(f"   分页信息: 第{pagination2.get('current_page')}页，共{pagination2.get('total_pages')}页")
                 
                 # 检查信号是否重复
-                signal_ids_1 = set(f"{s.get('symbol')}-{s.get('timeframe')}-{s.get('entry_price', 0)}" for s in signals)
-                signal_ids_2 = set(f"{s.get('symbol')}-{s.get('timeframe')}-{s.get('entry_price', 0)}" for s in signals2)
+                signal_ids_1 = {signal_fingerprint(s) for s in signals}
+                signal_ids_2 = {signal_fingerprint(s) for s in signals2}
                 
                 overlap = signal_ids_1 & signal_ids_2
                 if overlap:
@@ -84,15 +94,7 @@ def test_pagination_fix():
         # 4. 测试边界情况
         print("\n4. 测试边界情况...")
         
-        # 测试超出范围的页面
-        response = requests.post(f"{base_url}/multi_timeframe/analyze_multiple_symbols", 
-                               json={
-                                   'symbols': test_symbols,
-                                   'page': 999,  # 超大页码
-                                   'page_size': 10
-                               })
-        data999 = response.json()
-        
+        # 测试超出范围的页面（已与第1页并发获取）
         if data999['success']:
             signals999 = data999.get('signals', [])
             if len(signals999) == 0:
@@ -109,5 +111,8 @@ def test_pagination_fix():
         return False
 
 if __name__ == "__main__":
-    success = test_pagination_fix()
+    try:
+        success = test_pagination_fix()
+    finally:
+        _session.close()
     exit(0 if success else 1)
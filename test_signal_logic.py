@@ -9,7 +9,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from multi_timeframe_strategy import MultiTimeframeStrategy
+from multi_timeframe_strategy import MultiTimeframeStrategy, KLINES_DISK_CACHE_DIR
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -19,43 +19,39 @@ import logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def create_test_data():
-    """创建测试数据"""
-    # 创建100根4小时K线数据
-    dates = pd.date_range(start='2024-01-01', periods=100, freq='4H')
+# 各时间框架对应的小时数（模块级常量，供时间框架对齐检查使用）
+_TF_HOURS = {
+    '1m': 1/60, '3m': 3/60, '5m': 5/60, '15m': 15/60, '30m': 30/60,
+    '1h': 1, '4h': 4, '8h': 8, '12h': 12, '1d': 24, '3d': 72, '1w': 168
+}
+
+def create_test_data(n=100, seed=42):
+    """创建测试数据（固定随机种子，结果可复现）"""
+    # 创建n根4小时K线数据
+    dates = pd.date_range(start='2024-01-01', periods=n, freq='4H', name='timestamp')
+    rng = np.random.default_rng(seed)
     
     # 模拟价格数据：多头趋势，价格围绕EMA233波动
     base_price = 50000
-    prices = []
-    for i in range(100):
-        # 模拟价格围绕EMA233波动
-        trend = 0.001 * i  # 缓慢上升趋势
-        noise = np.random.normal(0, 0.02)  # 2%的随机波动
-        price = base_price * (1 + trend + noise)
-        prices.append(price)
-    
-    # 创建OHLCV数据
-    data = []
-    for i, price in enumerate(prices):
-        # 模拟OHLC
-        high = price * (1 + abs(np.random.normal(0, 0.01)))
-        low = price * (1 - abs(np.random.normal(0, 0.01)))
-        open_price = prices[i-1] if i > 0 else price
-        close = price
-        volume = np.random.uniform(1000, 5000)
-        
-        data.append({
-            'timestamp': dates[i],
-            'open': open_price,
-            'high': high,
-            'low': low,
-            'close': close,
-            'volume': volume
-        })
-    
-    df = pd.DataFrame(data)
-    df.set_index('timestamp', inplace=True)
-    return df
+    trend = 0.001 * np.arange(n)  # 缓慢上升趋势
+    noise = rng.normal(0, 0.02, n)  # 2%的随机波动
+    close = base_price * (1 + trend + noise)
+    
+    # 模拟OHLCV：开盘价取上一根收盘价
+    high = close * (1 + np.abs(rng.normal(0, 0.01, n)))
+    low = close * (1 - np.abs(rng.normal(0, 0.01, n)))
+    open_price = np.empty(n)
+    open_price[0] = close[0]
+    open_price[1:] = close[:-1]
+    volume = rng.uniform(1000, 5000, n)
+    
+    return pd.DataFrame({
+        'open': open_price,
+        'high': high,
+        'low': low,
+        'close': close,
+        'volume': volume
+    }, index=dates)
 
 def test_signal_logic():
     """测试信号逻辑"""
@@ -63,6 +59,7 @@ def test_signal_logic():
     
     # 创建策略实例
     strategy = MultiTimeframeStrategy()
+    strategy.kline_disk_cache_dir = KLINES_DISK_CACHE_DIR  # 多次运行复用已获取的K线
     
     # 创建测试数据
     df = create_test_data()
@@ -70,20 +67,17 @@ def test_signal_logic():
     
     # 计算技术指标
     df = strategy.calculate_emas(df)
-    df = strategy.calculate_bollinger_bands(df)
-    df.dropna(inplace=True)
+    df = strategy.calculate_bollinger_bands(df, trim_warmup=True)
     
     logger.info(f"计算指标后数据: {len(df)} 根K线")
     
-    # 检查趋势
-    is_bullish = strategy.is_bullish_trend(df)
-    is_bearish = strategy.is_bearish_trend(df)
+    # 检查趋势（一次读取最新EMA值）
+    trend = strategy.classify_trend(df)
     
-    logger.info(f"多头趋势: {is_bullish}")
-    logger.info(f"空头趋势: {is_bearish}")
+    logger.info(f"多头趋势: {trend == 'bullish'}")
+    logger.info(f"空头趋势: {trend == 'bearish'}")
     
     # 测试信号生成
-    trend = 'bullish' if is_bullish else 'bearish' if is_bearish else 'neutral'
     logger.info(f"当前趋势: {trend}")
     
     # 寻找所有大级别位置信号
@@ -105,6 +99,9 @@ def test_signal_logic():
     logger.info(f"支撑阻力信号数量: {len(support_resistance_signals)}")
     logger.info(f"总信号数量: {len(all_signals)}")
     
+    long_count = sum(1 for signal in all_signals if signal.get('signal') != 'short')
+    logger.info(f"做多/做空信号: {long_count}/{len(all_signals) - long_count}")
+    
     # 分析信号质量
     for i, signal in enumerate(all_signals[:5]):  # 只显示前5个信号
         logger.info(f"信号 {i+1}:")
@@ -123,8 +120,7 @@ def test_signal_logic():
     # 获取止盈数据
     tp_df = strategy.get_klines_data('BTCUSDT', take_profit_timeframe, 200)
     if not tp_df.empty:
-        tp_df = strategy.calculate_bollinger_bands(tp_df)
-        tp_df.dropna(inplace=True)
+        tp_df = strategy.calculate_bollinger_bands(tp_df, trim_warmup=True)
         
         if not tp_df.empty:
             bb_middle = tp_df['bb_middle'].iloc[-1]
@@ -151,19 +147,22 @@ def test_timeframe_alignment():
     
     strategy = MultiTimeframeStrategy()
     
+    pairs = list(strategy.take_profit_timeframes.items())
+    missing = {tf for pair in pairs for tf in pair} - _TF_HOURS.keys()
+    assert not missing, f"_TF_HOURS 缺少时间框架: {sorted(missing)}"
+    
+    # 一次性计算所有时间比例，并检查是否合理 (应该在10-100之间)
+    main_hours = np.array([_TF_HOURS[main_tf] for main_tf, _ in pairs])
+    tp_hours = np.array([_TF_HOURS[tp_tf] for _, tp_tf in pairs])
+    ratios = main_hours / tp_hours
+    valid = (ratios >= 10) & (ratios <= 100)
+    
     # 检查时间框架对应关系
-    for main_tf, tp_tf in strategy.take_profit_timeframes.items():
+    for (main_tf, tp_tf), ratio, ok in zip(pairs, ratios.tolist(), valid.tolist()):
         logger.info(f"{main_tf} -> {tp_tf}")
-        
-        # 验证时间框架比例是否合理
-        main_hours = {'4h': 4, '8h': 8, '12h': 12, '1d': 24, '3d': 72, '1w': 168}[main_tf]
-        tp_hours = {'5m': 5/60, '15m': 15/60, '30m': 30/60, '1h': 1, '4h': 4, '1d': 24}[tp_tf]
-        
-        ratio = main_hours / tp_hours
         logger.info(f"  时间比例: {ratio:.1f}:1")
         
-        # 检查比例是否合理 (应该在10-100之间)
-        if 10 <= ratio <= 100:
+        if ok:
             logger.info(f"  ✓ 时间比例合理")
         else:
             logger.warning(f"  ⚠ 时间比例可能不合理: {ratio:.1f}:1")
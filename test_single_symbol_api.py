@@ -3,39 +3,99 @@
 测试单个币种API调用
 """
 
-import requests
-import json
+from concurrent.futures import ThreadPoolExecutor
+
+# 可选导入ijson：安装后流式解析响应，只统计信号数量而不构造每个信号字典
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+    ijson = None
+
+from testing_utils import session as _session, json_loads
+
+_SUMMARY_KEYS = ('success', 'successful_timeframes', 'total_timeframes_analyzed', 'error')
+
+
+def _summarize_stream(raw):
+    """流式解析analyze_symbol响应，返回与完整解析相同结构的摘要（results中以signal_count代替all_signals）"""
+    summary = {'results': []}
+    result = None
+    for prefix, event, value in ijson.parse(raw):
+        if prefix == 'results.item.all_signals.item':
+            # 每个信号只在开始处计数一次，其内部字段不会命中该前缀
+            if event in ('start_map', 'start_array', 'string', 'number', 'boolean', 'null'):
+                result['signal_count'] += 1
+        elif prefix == 'results.item':
+            if event == 'start_map':
+                result = {'signal_count': 0}
+            elif event == 'end_map':
+                summary['results'].append(result)
+        elif prefix in ('results.item.timeframe', 'results.item.status'):
+            result[prefix.rsplit('.', 1)[1]] = value
+        elif prefix in _SUMMARY_KEYS and event not in ('start_map', 'start_array'):
+            summary[prefix] = value
+    return summary
+
+
+def _summarize_data(data):
+    """完整解析后的响应转换为同样的摘要结构（未安装ijson时使用）"""
+    summary = {key: data[key] for key in _SUMMARY_KEYS if key in data}
+    summary['results'] = [
+        {'timeframe': result.get('timeframe'), 'status': result.get('status'),
+         'signal_count': len(result.get('all_signals', []))}
+        for result in data.get('results', [])
+    ]
+    return summary
+
+
+def analyze_one(symbol):
+    """分析单个币种，返回该币种的输出行（并发执行时整段打印，避免交错）"""
+    out = [f"\n=== 测试币种: {symbol} ==="]
+    try:
+        with _session.post('http://localhost:5000/multi_timeframe/analyze_symbol',
+                           json={'symbol': symbol}, timeout=30, stream=True) as response:
+            if response.status_code != 200:
+                data = None
+            elif IJSON_AVAILABLE:
+                response.raw.decode_content = True
+                data = _summarize_stream(response.raw)
+            else:
+                data = _summarize_data(json_loads(response.content))
+        if data is not None:
+            if data['success']:
+                out.append(f"分析成功: {data['successful_timeframes']}/{data['total_timeframes_analyzed']} 个时间框架")
+                
+                # 统计信号
+                total_signals = 0
+                for result in data['results']:
+                    if result['status'] == 'success':
+                        signal_count = result['signal_count']
+                        total_signals += signal_count
+                        out.append(f"  {result['timeframe']}: {signal_count} 个信号")
+                
+                out.append(f"总信号数: {total_signals}")
+            else:
+                out.append(f"分析失败: {data.get('error', '未知错误')}")
+        else:
+            out.append(f"HTTP错误: {response.status_code}")
+    except Exception as e:
+        out.append(f"分析币种失败: {e}")
+    return out
 
 def test_single_symbols():
     """测试单个币种分析"""
     symbols = ['ETHUSDT', 'BTCUSDT', 'SOLUSDT']
     
-    for symbol in symbols:
-        print(f"\n=== 测试币种: {symbol} ===")
-        try:
-            response = requests.post('http://localhost:5000/multi_timeframe/analyze_symbol', 
-                                   json={'symbol': symbol}, timeout=30)
-            if response.status_code == 200:
-                data = response.json()
-                if data['success']:
-                    print(f"分析成功: {data['successful_timeframes']}/{data['total_timeframes_analyzed']} 个时间框架")
-                    
-                    # 统计信号
-                    total_signals = 0
-                    for result in data['results']:
-                        if result['status'] == 'success':
-                            signal_count = len(result.get('all_signals', []))
-                            total_signals += signal_count
-                            print(f"  {result['timeframe']}: {signal_count} 个信号")
-                    
-                    print(f"总信号数: {total_signals}")
-                else:
-                    print(f"分析失败: {data.get('error', '未知错误')}")
-            else:
-                print(f"HTTP错误: {response.status_code}")
-        except Exception as e:
-            print(f"分析币种失败: {e}")
+    # 各币种请求互不依赖，并发发起；按原顺序输出结果
+    with ThreadPoolExecutor(max_workers=min(8, len(symbols))) as executor:
+        for out in executor.map(analyze_one, symbols):
+            print("\n".join(out))
 
 if __name__ == "__main__":
-    test_single_symbols()
+    try:
+        test_single_symbols()
+    finally:
+        _session.close()
 
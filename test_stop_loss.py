@@ -8,7 +8,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from multi_timeframe_strategy import MultiTimeframeStrategy
+from multi_timeframe_strategy import STRATEGY_CONFIGS
 
 def test_stop_loss_logic():
     """测试止损逻辑"""
@@ -16,12 +16,12 @@ def test_stop_loss_logic():
     print("测试止损逻辑")
     print("=" * 60)
     
-    # 创建修改策略实例
-    modified_strategy = MultiTimeframeStrategy('modified')
+    # 直接读取修改策略配置，无需实例化策略
+    modified_config = STRATEGY_CONFIGS['modified']
     
     print("新策略配置:")
-    print(f"  时间框架: {modified_strategy.timeframes}")
-    print(f"  止盈配置: {modified_strategy.take_profit_timeframes}")
+    print(f"  时间框架: {modified_config['timeframes']}")
+    print(f"  止盈配置: {modified_config['take_profit_timeframes']}")
     
     print("\n止损逻辑说明:")
     print("1. 做多信号：3分钟布林中轨必须高于入场价格，否则舍弃信号")
@@ -8,7 +8,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from multi_timeframe_strategy import MultiTimeframeStrategy
+from multi_timeframe_strategy import STRATEGY_CONFIGS
 
 def test_strategy_configuration():
     """测试两种策略的配置"""
@@ -18,14 +18,14 @@ def test_strategy_configuration():
     
     # 测试原策略
     print("1. 原策略配置:")
-    original_strategy = MultiTimeframeStrategy('original')
-    print(f"   时间框架: {original_strategy.timeframes}")
-    print(f"   止盈配置: {original_strategy.take_profit_timeframes}")
+    original_config = STRATEGY_CONFIGS['original']
+    print(f"   时间框架: {original_config['timeframes']}")
+    print(f"   止盈配置: {original_config['take_profit_timeframes']}")
     
     print("\n2. 修改策略配置:")
-    modified_strategy = MultiTimeframeStrategy('modified')
-    print(f"   时间框架: {modified_strategy.timeframes}")
-    print(f"   止盈配置: {modified_strategy.take_profit_timeframes}")
+    modified_config = STRATEGY_CONFIGS['modified']
+    print(f"   时间框架: {modified_config['timeframes']}")
+    print(f"   止盈配置: {modified_config['take_profit_timeframes']}")
     
     print("\n" + "=" * 60)
     print("策略对比")
@@ -4,11 +4,13 @@
 测试止盈点位计算逻辑
 """
 
-from multi_timeframe_strategy import MultiTimeframeStrategy
+from multi_timeframe_strategy import MultiTimeframeStrategy, KLINES_DISK_CACHE_DIR
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 
 def test_take_profit_logic():
     strategy = MultiTimeframeStrategy()
+    strategy.kline_disk_cache_dir = KLINES_DISK_CACHE_DIR  # 多次运行复用已获取的K线
     symbol = 'BTCUSDT'
     
     print("=== 止盈点位计算逻辑详解 ===\n")
@@ -16,12 +18,19 @@ def test_take_profit_logic():
     # 测试不同时间框架
     timeframes = ['4h', '8h', '12h', '1d', '3d', '1w']
     
+    # 各时间框架的主K线与止盈K线互不依赖，先并发获取全部数据，再按顺序计算输出
+    requests_needed = {(timeframe, 300) for timeframe in timeframes}
+    requests_needed |= {(strategy.take_profit_timeframes.get(timeframe, '15m'), 200) for timeframe in timeframes}
+    with ThreadPoolExecutor(max_workers=len(requests_needed)) as executor:
+        futures = {key: executor.submit(strategy.get_klines_data, symbol, *key) for key in requests_needed}
+    klines = {key: future.result() for key, future in futures.items()}
+    
     for timeframe in timeframes:
         print(f"📊 时间框架: {timeframe}")
         print("-" * 50)
         
         # 获取主时间框架数据
-        main_df = strategy.get_klines_data(symbol, timeframe, 300)
+        main_df = klines[(timeframe, 300)]
         if main_df is None or main_df.empty:
             print(f"❌ 无法获取 {timeframe} 数据")
             continue
@@ -45,13 +54,12 @@ def test_take_profit_logic():
         print(f"⏰ 止盈时间框架: {take_profit_timeframe}")
         
         # 获取止盈时间框架数据
-        tp_df = strategy.get_klines_data(symbol, take_profit_timeframe, 200)
+        tp_df = klines[(take_profit_timeframe, 200)]
         if tp_df is None or tp_df.empty:
             print(f"❌ 无法获取 {take_profit_timeframe} 数据")
             continue
             
-        tp_df = strategy.calculate_bollinger_bands(tp_df)
-        tp_df.dropna(inplace=True)
+        tp_df = strategy.calculate_bollinger_bands(tp_df, trim_warmup=True)
         
         if tp_df.empty:
             print(f"❌ {take_profit_timeframe} 数据为空")
@@ -4,12 +4,13 @@
 测试不同时间框架的信号生成
 """
 
-import requests
 import json
 
+from testing_utils import session as _session
+
 def test_timeframes():
     # 测试单个币种的所有时间框架
-    response = requests.post('http://localhost:5000/multi_timeframe/analyze_symbol', 
+    response = _session.post('http://localhost:5000/multi_timeframe/analyze_symbol', 
                             json={'symbol': 'BTCUSDT'},
                             headers={'Content-Type': 'application/json'})
 
@@ -43,4 +44,7 @@ def test_timeframes():
                 print(f'   预期收益率: {profit_pct:.2f}%')
 
 if __name__ == "__main__":
-    test_timeframes()
+    try:
+        test_timeframes()
+    finally:
+        _session.close()
@@ -3,14 +3,15 @@
 测试前20个币种获取功能
 """
 
-import requests
 import json
 
+from testing_utils import session as _session
+
 def test_get_top_20_symbols():
     """测试获取前20个币种"""
     print("=== 测试获取前20个币种 ===")
     try:
-        response = requests.get('http://localhost:5000/multi_timeframe/get_top_symbols', timeout=15)
+        response = _session.get('http://localhost:5000/multi_timeframe/get_top_symbols', timeout=15)
         if response.status_code == 200:
             data = response.json()
             print(f"成功获取 {data['count']} 个币种")
@@ -36,5 +37,8 @@ def test_get_top_20_symbols():
         return []
 
 if __name__ == "__main__":
-    test_get_top_20_symbols()
+    try:
+        test_get_top_20_symbols()
+    finally:
+        _session.close()
 
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试脚本共用的HTTP会话与JSON解析
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# 可选导入orjson，未安装时回退到标准库json
+try:
+    from orjson import dumps as json_dumps, loads as json_loads
+except ImportError:
+    from json import dumps as json_dumps, loads as json_loads
+
+__all__ = ['json_dumps', 'json_loads', 'make_session', 'session']
+
+
+def make_session(pool_maxsize: int = 32) -> requests.Session:
+    """创建带连接池、keep-alive与少量重试的会话"""
+    s = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=pool_maxsize,
+        max_retries=Retry(total=2, backoff_factor=0.2)
+    )
+    s.mount('http://', adapter)
+    s.mount('https://', adapter)
+    return s
+
+
+# 各测试脚本复用同一个会话，避免每个请求重新建立连接
+session = make_session()
@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 import logging
 import requests
 import pandas as pd
@@ -8,15 +8,137 @@ from typing import Dict, List, Optional, Tuple
 import sqlite3
 import os
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import indicators_numba
+
+# 可选导入orjson，未安装时回退到flask.jsonify
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+
+
+def ojsonify(obj, status=200):
+    """序列化为JSON响应：优先使用orjson（直接输出bytes，支持numpy标量/数组）"""
+    if not ORJSON_AVAILABLE:
+        response = jsonify(obj)
+        response.status_code = status
+        return response
+    body = orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return Response(body, status=status, mimetype='application/json')
+
 # 创建Blueprint
 ultra_short_bp = Blueprint('ultra_short', __name__, url_prefix='/ultra_short')
 
 # 数据库路径
 DB_PATH = os.getenv('SQLITE_PATH', 'bollinger_strategy.db')
 
+# 并发获取K线的默认线程数（可通过请求参数 concurrency 调整，避免触发交易所限频）
+DEFAULT_FETCH_WORKERS = 8
+
+# 时间框架到Gate.io K线周期的映射（Gate.io没有2m，使用1m数据）
+GATE_INTERVAL_MAP = {
+    '1m': '1m', '2m': '1m', '3m': '3m', '5m': '5m',
+    '15m': '15m', '1h': '1h', '4h': '4h', '12h': '12h', '1d': '1d', '1w': '1w'
+}
+
+# 各Gate.io周期的秒数，用于K线缓存按K线周期分桶
+GATE_INTERVAL_SECONDS = {
+    '1m': 60, '3m': 180, '5m': 300, '15m': 900, '1h': 3600,
+    '4h': 14400, '12h': 43200, '1d': 86400, '1w': 604800
+}
+
+# K线缓存：同一根K线周期内最多复用这么多秒（最新K线仍在变化，不能按整个周期缓存）
+KLINE_CACHE_MAX_TTL = 30
+KLINE_CACHE_SIZE = 256
+
+# 入场判断只看最近这么多根K线是否贴近布林下轨；布林带只需在其所需的尾部数据上计算
+LOWER_BAND_LOOKBACK = 20
+BB_PERIOD = 20
+LOWER_BAND_SCAN_BARS = LOWER_BAND_LOOKBACK + BB_PERIOD - 1
+
+# ZigZag（pivotlow）左右各比较的K线数量
+ZIGZAG_DEPTH = 12
+
+# 价格保留位数：按数量级分段（<0.01 保留8位，<1 保留6位，其余保留2位）
+_PRICE_THRESHOLDS = np.array([0.01, 1.0])
+_PRICE_DIGITS = (8, 6, 2)
+
+
+def round_prices(values) -> List[Optional[float]]:
+    """批量按数量级四舍五入价格：一次向量化确定各值的保留位数，None/NaN返回None"""
+    arr = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    digit_idx = np.searchsorted(_PRICE_THRESHOLDS, np.abs(arr), side='right')
+    return [round(v, _PRICE_DIGITS[i]) if np.isfinite(v) else None
+            for v, i in zip(arr.tolist(), digit_idx.tolist())]
+
+
+def round_price(value) -> Optional[float]:
+    """按数量级四舍五入单个价格"""
+    return round_prices((value,))[0]
+
+
+def parse_concurrency(value, upper: int) -> Optional[int]:
+    """解析请求参数 concurrency，限制在 [1, upper] 之间（upper为本次需要获取的K线组数）；非整数时返回None"""
+    if value is None:
+        value = DEFAULT_FETCH_WORKERS
+    if isinstance(value, bool):
+        return None
+    try:
+        n = int(value)
+    except (TypeError, ValueError):
+        return None
+    return min(max(1, n), upper)
+
+
+def epoch_seconds(index: pd.DatetimeIndex) -> List[int]:
+    """DatetimeIndex整体转换为Unix秒列表（等价于逐个 int(ts.timestamp())）"""
+    return index.values.astype('datetime64[s]').astype(np.int64).tolist()
+
+
+def pivot_low_positions(low: np.ndarray, depth: int = ZIGZAG_DEPTH) -> np.ndarray:
+    """pivotlow：返回低点的位置索引（其低价不高于左右各depth根K线中的任何一根）
+
+    低点等价于以它为中心、宽2*depth+1的窗口最小值，用滑动窗口一次求出全部位置
+    """
+    low = np.asarray(low, dtype=np.float64)
+    width = 2 * depth + 1
+    if len(low) < width:
+        return np.empty(0, dtype=np.intp)
+    window_min = np.lib.stride_tricks.sliding_window_view(low, width).min(axis=1)
+    return np.flatnonzero(low[depth:len(low) - depth] == window_min) + depth
+
+
+def is_zigzag_ascending(lows) -> bool:
+    """最近的ZigZag低点是否越来越高（要求：有3个HL最好，最差2个也行）"""
+    if len(lows) < 2:
+        return False
+    return bool(np.all(np.diff(np.asarray(lows[-3:], dtype=np.float64)) > 0))
+
+
+def nearest_low_to_lower_band(df: pd.DataFrame, lookback: int = LOWER_BAND_LOOKBACK) -> Optional[Tuple[float, float]]:
+    """在最近lookback根K线中找低点最接近布林下轨（99%-100.5%）的一根，返回(低点, 下轨)
+
+    直接在NumPy尾部视图上向量化计算，避免逐行 .iloc 取值；并列时取最早的一根
+    """
+    low = df['low'].to_numpy(dtype=np.float64)[-lookback:]
+    bb_lower = df['bb_lower'].to_numpy(dtype=np.float64)[-lookback:]
+    valid = (bb_lower > 0) & ~np.isnan(low)
+    ratio = np.divide(low, bb_lower, out=np.full_like(low, np.nan), where=valid)
+    distance = np.where(valid & (ratio >= 0.99) & (ratio <= 1.005), np.abs(ratio - 1.0), np.inf)
+    if not len(distance) or not np.isfinite(distance).any():
+        return None
+    best = int(np.argmin(distance))
+    return float(low[best]), float(bb_lower[best])
+
 class UltraShortStrategy:
     """超短线BTC信号策略"""
     
@@ -29,6 +151,9 @@ class UltraShortStrategy:
         self.symbol = "BTC_USDT"  # Gate.io格式
         self.stop_loss_points = 150  # 固定止损点数
         self.max_position_pct = 0.05  # 最大仓位5%
+        # K线缓存：{(symbol, gate_interval, limit, 周期桶): (写入时间, DataFrame)}
+        self.kline_cache = {}
+        self.kline_cache_lock = threading.Lock()
         self.init_database()
     
     def init_database(self):
@@ -91,17 +216,39 @@ class UltraShortStrategy:
         return symbol
     
     def get_klines(self, symbol: str, interval: str, limit: int = 1000) -> Optional[pd.DataFrame]:
-        """获取K线数据"""
+        """获取K线数据（带TTL缓存）；返回副本，调用方可以安全地原地添加指标列"""
+        gate_interval = GATE_INTERVAL_MAP.get(interval, interval)
+        interval_seconds = GATE_INTERVAL_SECONDS.get(gate_interval, 60)
+        now = time.time()
+        # 键中包含当前K线周期桶：新K线开始后自动失效
+        key = (self._normalize_symbol(symbol), gate_interval, limit, int(now // interval_seconds))
+        ttl = min(interval_seconds, KLINE_CACHE_MAX_TTL)
+        
+        with self.kline_cache_lock:
+            cached = self.kline_cache.get(key)
+        if cached is not None and now - cached[0] < ttl:
+            return cached[1].copy()
+        
+        df = self._fetch_klines(symbol, interval, limit)
+        if df is not None:
+            with self.kline_cache_lock:
+                self.kline_cache.pop(key, None)
+                self.kline_cache[key] = (now, df)
+                while len(self.kline_cache) > KLINE_CACHE_SIZE:
+                    del self.kline_cache[next(iter(self.kline_cache))]
+            return df.copy()
+        return None
+    
+    def clear_kline_cache(self):
+        """清空K线缓存"""
+        with self.kline_cache_lock:
+            self.kline_cache.clear()
+    
+    def _fetch_klines(self, symbol: str, interval: str, limit: int = 1000) -> Optional[pd.DataFrame]:
+        """从Gate.io获取K线数据"""
         try:
             gate_symbol = self._normalize_symbol(symbol)
-            
-            interval_map = {
-                '1m': '1m', '2m': '1m', '3m': '3m', '5m': '5m',
-                '15m': '15m', '1h': '1h', '4h': '4h', '12h': '12h', '1d': '1d', '1w': '1w'
-            }
-            gate_interval = interval_map.get(interval)
-            if not gate_interval:
-                gate_interval = interval
+            gate_interval = GATE_INTERVAL_MAP.get(interval, interval)
             
             url = f"{self.gate_url}/spot/candlesticks"
             params = {
@@ -138,18 +285,82 @@ class UltraShortStrategy:
             logger.error(f"获取K线数据失败 {symbol} {interval}: {e}")
             return None
     
+    def get_klines_batch(self, symbol: str, specs: List[Tuple[str, int]],
+                         max_workers: int = DEFAULT_FETCH_WORKERS) -> Dict[Tuple[str, int], Optional[pd.DataFrame]]:
+        """并发获取多组K线，返回 {(interval, limit): DataFrame或None}
+        
+        映射到同一Gate.io周期的请求（如1m与2m）只发起一次，其余键得到数据副本
+        """
+        requests_by_gate = {}
+        for interval, limit in specs:
+            requests_by_gate.setdefault((GATE_INTERVAL_MAP.get(interval, interval), limit), []).append((interval, limit))
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(requests_by_gate)))) as executor:
+            futures = {gate_key: executor.submit(self.get_klines, symbol, keys[0][0], gate_key[1])
+                       for gate_key, keys in requests_by_gate.items()}
+        
+        klines = {}
+        for gate_key, keys in requests_by_gate.items():
+            df = futures[gate_key].result()
+            for i, key in enumerate(keys):
+                # 调用方会原地添加指标列，共享同一数据时为其余键复制
+                klines[key] = df if i == 0 or df is None else df.copy()
+        return klines
+    
     def calculate_bollinger_bands(self, df: pd.DataFrame, period: int = 20, std: float = 2) -> pd.DataFrame:
         """计算布林带"""
-        df['bb_middle'] = df['close'].rolling(window=period).mean()
+        df['bb_middle'] = indicators_numba.sma(df['close'].to_numpy(dtype=np.float64), period)
         df['bb_std'] = df['close'].rolling(window=period).std()
         df['bb_upper'] = df['bb_middle'] + (df['bb_std'] * std)
         df['bb_lower'] = df['bb_middle'] - (df['bb_std'] * std)
         return df
     
+    def latest_bollinger_bands(self, df: pd.DataFrame, period: int = 20,
+                               std: float = 2) -> Optional[Tuple[float, float, float]]:
+        """只计算最新一根K线的布林带，返回(下轨, 中轨, 上轨)；数据不足一个窗口时返回None
+        
+        只需要最新值时，对最后period个收盘价求均值与样本标准差（与 rolling().std() 一致），
+        不再构造整列的rolling结果
+        """
+        if df is None or len(df) < period:
+            return None
+        window = df['close'].to_numpy(dtype=np.float64)[-period:]
+        middle = window.mean()
+        band = window.std(ddof=1) * std
+        if not np.isfinite(middle) or not np.isfinite(band):
+            return None
+        return float(middle - band), float(middle), float(middle + band)
+    
+    def latest_bollinger_bands_batch(self, frames: List[Optional[pd.DataFrame]], period: int = 20,
+                                     std: float = 2) -> np.ndarray:
+        """批量计算多组K线最新一根的布林带，返回形状为(len(frames), 3)的(下轨, 中轨, 上轨)数组
+        
+        各组最后period个收盘价堆叠为二维数组，按行一次求均值与样本标准差；
+        数据不足一个窗口或含NaN的行为NaN
+        """
+        bands = np.full((len(frames), 3), np.nan)
+        rows = [i for i, df in enumerate(frames) if df is not None and len(df) >= period]
+        if not rows:
+            return bands
+        windows = np.stack([frames[i]['close'].to_numpy(dtype=np.float64)[-period:] for i in rows])
+        middle = windows.mean(axis=1)
+        band = windows.std(axis=1, ddof=1) * std
+        bands[rows] = np.column_stack((middle - band, middle, middle + band))
+        return bands
+    
+    def ema_values(self, close: np.ndarray, period: int) -> np.ndarray:
+        """计算EMA序列（等价于 ewm(span=period, adjust=False)），输入输出均为ndarray"""
+        return indicators_numba.ema(close, period)
+    
+    def ema_last(self, close: np.ndarray, period: int) -> float:
+        """只计算EMA最新值（只读取最后一个值时使用，不生成整条序列）"""
+        return indicators_numba.ema_last(close, period)
+    
     def calculate_ema(self, df: pd.DataFrame, periods: List[int]) -> pd.DataFrame:
         """计算EMA"""
+        close = df['close'].to_numpy(dtype=np.float64)
         for period in periods:
-            df[f'ema{period}'] = df['close'].ewm(span=period, adjust=False).mean()
+            df[f'ema{period}'] = self.ema_values(close, period)
         return df
     
     def is_bullish_trend(self, df: pd.DataFrame) -> bool:
@@ -157,32 +368,39 @@ class UltraShortStrategy:
         required_emas = ['ema89', 'ema144', 'ema233']
         if not all(ema in df.columns for ema in required_emas) or len(df) < 1:
             return False
-        latest = df.iloc[-1]
-        return latest['ema89'] > latest['ema144'] > latest['ema233']
+        ema89, ema144, ema233 = (df[col].to_numpy()[-1] for col in required_emas)
+        return ema89 > ema144 > ema233
     
-    def find_support_levels(self, symbol: str) -> List[float]:
-        """识别支撑位：最近一周的1h/4h密集成交区"""
+    def find_support_levels(self, symbol: str,
+                            klines: Optional[Dict[str, pd.DataFrame]] = None) -> List[float]:
+        """识别支撑位：最近一周的1h/4h密集成交区
+        
+        klines 可传入调用方已获取的 {时间框架: DataFrame}（只读），缺少的时间框架一次并发获取
+        """
         try:
             support_levels = []
             
             # 获取最近一周的1h和4h数据
-            for timeframe in ['1h', '4h']:
-                df = self.get_klines(symbol, timeframe, limit=168 if timeframe == '1h' else 42)
+            limits = {'1h': 168, '4h': 42}
+            klines = dict(klines or {})
+            missing = [(tf, limit) for tf, limit in limits.items() if tf not in klines]
+            if missing:
+                fetched = self.get_klines_batch(symbol, missing)
+                klines.update({tf: fetched[(tf, limit)] for tf, limit in missing})
+            
+            for timeframe in limits:
+                df = klines[timeframe]
                 if df is None or len(df) < 20:
                     continue
                 
-                # 使用成交量加权价格（VWAP）识别密集成交区
-                df['typical_price'] = (df['high'] + df['low'] + df['close']) / 3
-                df['vwap'] = (df['typical_price'] * df['volume']).rolling(window=20).sum() / df['volume'].rolling(window=20).sum()
-                
                 # 识别价格密集区域（价格在一定范围内的K线数量）
                 price_range = df['close'].max() - df['close'].min()
                 bin_size = price_range / 20  # 分成20个区间
                 
                 # 计算每个价格区间的成交量
                 bins = np.arange(df['close'].min(), df['close'].max() + bin_size, bin_size)
-                df['price_bin'] = pd.cut(df['close'], bins=bins)
-                volume_by_bin = df.groupby('price_bin')['volume'].sum()
+                price_bins = pd.cut(df['close'], bins=bins)
+                volume_by_bin = df['volume'].groupby(price_bins).sum()
                 
                 # 找出成交量最大的3个区间作为支撑位
                 top_bins = volume_by_bin.nlargest(3)
@@ -213,49 +431,19 @@ class UltraShortStrategy:
             if df_1h is None or len(df_1h) < 100:
                 return None
             
-            # 使用pivotlow识别低点
-            zigzag_lows = []
-            depth = 12
-            for i in range(depth, len(df_1h) - depth):
-                current_low = df_1h.iloc[i]['low']
-                # 检查是否是pivot low
-                is_pivot = True
-                for j in range(i - depth, i):
-                    if df_1h.iloc[j]['low'] < current_low:
-                        is_pivot = False
-                        break
-                for j in range(i + 1, i + depth + 1):
-                    if df_1h.iloc[j]['low'] < current_low:
-                        is_pivot = False
-                        break
-                
-                if is_pivot:
-                    zigzag_lows.append(float(current_low))
-            
-            # 获取最近的低点，判断是否越来越高（要求：有3个HL最好，最差2个也行）
-            zigzag_ascending = False
-            if len(zigzag_lows) >= 2:
-                # 如果有3个或更多，取最近3个；如果只有2个，就用这2个
-                recent_lows = zigzag_lows[-3:] if len(zigzag_lows) >= 3 else zigzag_lows[-2:]
-                # 判断是否递增（每个低点都比前一个高）
-                is_ascending = True
-                for i in range(1, len(recent_lows)):
-                    if recent_lows[i] <= recent_lows[i-1]:
-                        is_ascending = False
-                        break
-                zigzag_ascending = is_ascending
+            # 使用pivotlow识别低点，判断最近的低点是否越来越高
+            low_1h = df_1h['low'].to_numpy(dtype=np.float64)
+            zigzag_lows = low_1h[pivot_low_positions(low_1h)]
             
             # 如果ZigZag趋势不符合要求，直接返回None
-            if not zigzag_ascending:
+            if not is_zigzag_ascending(zigzag_lows):
                 return None
             
             # 2. 获取当前价格，检查是否接近1-5min或1h布林带下轨
-            # 先获取1h布林带下轨
-            df_1h_bb = self.get_klines(symbol, '1h', limit=200)
-            if df_1h_bb is None or len(df_1h_bb) < 20:
-                return None
-            
-            df_1h_bb = self.calculate_bollinger_bands(df_1h_bb, period=20, std=2)
+            # 先计算1h布林带下轨（复用上面的1h数据，不再重复获取）
+            # 只用到最近LOWER_BAND_LOOKBACK根的下轨与最新中轨，截取尾部后再计算滚动窗口
+            df_1h_bb = self.calculate_bollinger_bands(
+                df_1h.iloc[-LOWER_BAND_SCAN_BARS:].copy(), period=BB_PERIOD, std=2)
             df_1h_bb = df_1h_bb.dropna()
             if len(df_1h_bb) < 1:
                 return None
@@ -266,78 +454,44 @@ class UltraShortStrategy:
             bb_lower_used = None
             entry_price = None
             entry_timeframes = ['1m', '2m', '3m', '5m']
+            # 各入场时间框架的K线一次并发获取
+            short_klines = self.get_klines_batch(symbol, [(tf, 100) for tf in entry_timeframes])
             
             for entry_tf in entry_timeframes:
-                df_short = self.get_klines(symbol, entry_tf, limit=100)
+                df_short = short_klines[(entry_tf, 100)]
                 if df_short is None or len(df_short) < 20:
                     continue
                 
-                df_short = self.calculate_bollinger_bands(df_short, period=20, std=2)
+                df_short = self.calculate_bollinger_bands(
+                    df_short.iloc[-LOWER_BAND_SCAN_BARS:].copy(), period=BB_PERIOD, std=2)
                 df_short = df_short.dropna()
                 if len(df_short) < 1:
                     continue
                 
                 # 检查最近20个K线，找到低点最接近下轨的那个K线
-                lookback = min(20, len(df_short))
-                best_low_price = None
-                best_low_ratio = None
-                best_bb_lower = None
-                
-                for i in range(len(df_short) - lookback, len(df_short)):
-                    row = df_short.iloc[i]
-                    bb_lower = row['bb_lower']
-                    low_price = row['low']
-                    
-                    if bb_lower > 0 and pd.notna(low_price):
-                        ratio = low_price / bb_lower
-                        # 检查低点是否在下轨附近（99%-100.5%）
-                        if 0.99 <= ratio <= 1.005:
-                            if best_low_ratio is None or abs(ratio - 1.0) < abs(best_low_ratio - 1.0):
-                                best_low_price = low_price
-                                best_low_ratio = ratio
-                                best_bb_lower = bb_lower
-                
-                if best_low_price is not None:
+                nearest = nearest_low_to_lower_band(df_short)
+                if nearest is not None:
                     price_near_short_lower = True
                     entry_timeframe_used = entry_tf
-                    bb_lower_used = best_bb_lower
-                    entry_price = best_low_price
+                    entry_price, bb_lower_used = nearest
                     break
             
             # 检查价格是否接近1h下轨
             price_near_1h_lower = False
             if not price_near_short_lower:
                 # 检查最近20个1h K线，找到低点最接近下轨的那个K线
-                lookback = min(20, len(df_1h_bb))
-                best_low_price_1h = None
-                best_low_ratio_1h = None
-                best_bb_lower_1h = None
-                
-                for i in range(len(df_1h_bb) - lookback, len(df_1h_bb)):
-                    row = df_1h_bb.iloc[i]
-                    bb_lower = row['bb_lower']
-                    low_price = row['low']
-                    
-                    if bb_lower > 0 and pd.notna(low_price):
-                        ratio = low_price / bb_lower
-                        # 检查低点是否在下轨附近（99%-100.5%）
-                        if 0.99 <= ratio <= 1.005:
-                            if best_low_ratio_1h is None or abs(ratio - 1.0) < abs(best_low_ratio_1h - 1.0):
-                                best_low_price_1h = low_price
-                                best_low_ratio_1h = ratio
-                                best_bb_lower_1h = bb_lower
-                
-                if best_low_price_1h is not None:
+                nearest_1h = nearest_low_to_lower_band(df_1h_bb)
+                if nearest_1h is not None:
                     price_near_1h_lower = True
                     entry_timeframe_used = '1h'
-                    bb_lower_used = best_bb_lower_1h
-                    entry_price = best_low_price_1h
+                    entry_price, bb_lower_used = nearest_1h
             
             # 如果价格接近1-5min或1h下轨（满足其一即可）
             if price_near_short_lower or price_near_1h_lower:
                 
                 # 获取支撑位（保留用于信号强度判断，但不作为必要条件）
-                support_levels = self.find_support_levels(symbol)
+                # 最近一周的1h数据即已获取的200根中的最后168根
+                support_levels = self.find_support_levels(symbol, {'1h': df_1h.iloc[-168:]})
                 support_level = support_levels[0] if support_levels else None
                 
                 # 使用找到的低点价格作为入场价
@@ -350,21 +504,26 @@ class UltraShortStrategy:
                 take_profit_price = entry_price + take_profit_points
                 risk_reward = take_profit_points / self.stop_loss_points  # 800/150 = 5.33
                 
-                # 生成信号
+                # 生成信号（价格字段一次批量取整）
+                (entry_rounded, bb_lower_rounded, support_rounded, stop_loss_rounded,
+                 take_profit_rounded, bb_middle_rounded) = round_prices((
+                    entry_price, bb_lower_used, support_level or None, stop_loss,
+                    take_profit_price, df_1h_bb['bb_middle'].iloc[-1]
+                ))
                 signal = {
                     'symbol': symbol,
                     'signal_type': 'long',
-                    'entry_price': round(entry_price, 2),
+                    'entry_price': entry_rounded,
                     'entry_timeframe': entry_timeframe_used,
                     'direction_timeframe': '1h',
-                    'bollinger_lower': round(bb_lower_used, 2),
-                    'support_level': round(support_level, 2) if support_level else None,
-                    'stop_loss': round(stop_loss, 2),
-                    'take_profit_price': round(take_profit_price, 2),
+                    'bollinger_lower': bb_lower_rounded,
+                    'support_level': support_rounded,
+                    'stop_loss': stop_loss_rounded,
+                    'take_profit_price': take_profit_rounded,
                     'risk_reward_ratio': risk_reward,
                     'signal_strength': 'high' if support_level and entry_price >= support_level * 0.99 else 'medium',
-                    'current_price': round(entry_price, 2),
-                    'bb_middle': round(latest_1h_bb['bb_middle'], 2),
+                    'current_price': entry_rounded,
+                    'bb_middle': bb_middle_rounded,
                     'timestamp': datetime.now().isoformat()
                 }
                 
@@ -484,40 +643,26 @@ class UltraShortStrategy:
             if current_price <= 0:
                 return 0
             
-            # 获取所有活跃信号
-            active_signals = self.get_active_signals()
-            
+            # 价格仍在(止损价, 止盈价)区间内的活跃信号无需处理：
+            # 把阈值判断放进UPDATE的WHERE条件，不再逐条读出活跃信号到Python中比较
             conn = sqlite3.connect(DB_PATH)
             cursor = conn.cursor()
             
-            for signal in active_signals:
-                signal_id = signal['id']
-                entry_price = float(signal['entry_price'])
-                stop_loss = float(signal['stop_loss'])
-                take_profit_price = float(signal['take_profit_price'])
-                current_status = signal['status']
-                
-                # 只处理活跃状态的信号
-                if current_status != 'active':
-                    continue
-                
-                new_status = None
-                
-                # 检查是否触发止损（当前价格 <= 止损价）
-                if current_price <= stop_loss:
-                    new_status = 'stopped_out'  # 已止损
-                # 检查是否触发止盈（当前价格 >= 止盈价）
-                elif current_price >= take_profit_price:
-                    new_status = 'take_profit'  # 已止盈
-                
-                # 如果状态需要更新
-                if new_status:
-                    cursor.execute('''
-                        UPDATE ultra_short_signals 
-                        SET status = ?, updated_at = CURRENT_TIMESTAMP
-                        WHERE id = ?
-                    ''', (new_status, signal_id))
-                    updated_count += 1
+            # 检查是否触发止损（当前价格 <= 止损价）
+            cursor.execute('''
+                UPDATE ultra_short_signals 
+                SET status = 'stopped_out', updated_at = CURRENT_TIMESTAMP
+                WHERE status = 'active' AND stop_loss >= ?
+            ''', (current_price,))
+            updated_count += cursor.rowcount
+            
+            # 检查是否触发止盈（当前价格 >= 止盈价）；已止损的信号不再是active，保持先止损后止盈的优先级
+            cursor.execute('''
+                UPDATE ultra_short_signals 
+                SET status = 'take_profit', updated_at = CURRENT_TIMESTAMP
+                WHERE status = 'active' AND take_profit_price <= ?
+            ''', (current_price,))
+            updated_count += cursor.rowcount
             
             conn.commit()
             conn.close()
@@ -549,13 +694,13 @@ def check_signal():
             signal_id = strategy.save_signal(signal)
             signal['id'] = signal_id
             
-            return jsonify({
+            return ojsonify({
                 'success': True,
                 'has_signal': True,
                 'signal': signal
             })
         else:
-            return jsonify({
+            return ojsonify({
                 'success': True,
                 'has_signal': False,
                 'signal': None
@@ -563,7 +708,7 @@ def check_signal():
             
     except Exception as e:
         logger.error(f"检查信号API失败: {e}", exc_info=True)
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}), 500
 
 
 @ultra_short_bp.route('/get_klines', methods=['GET', 'POST'])
@@ -574,25 +719,39 @@ def get_klines():
         symbol = data.get('symbol', 'BTC')
         interval = data.get('interval', '1m')
         limit = data.get('limit', 200)
+        # compact=true 时返回列式数据（每列一个数组），启用orjson时以float32直接序列化numpy数组
+        compact = bool(data.get('compact', False))
         
         df = strategy.get_klines(symbol, interval, limit)
         
         if df is None or df.empty:
-            return jsonify({'success': False, 'error': '无法获取K线数据'}), 404
+            return ojsonify({'success': False, 'error': '无法获取K线数据'}), 404
         
-        # 转换为JSON格式
-        klines = []
-        for idx, row in df.iterrows():
-            klines.append({
-                'time': int(idx.timestamp()),
-                'open': float(row['open']),
-                'high': float(row['high']),
-                'low': float(row['low']),
-                'close': float(row['close']),
-                'volume': float(row['volume'])
+        columns = ('open', 'high', 'low', 'close', 'volume')
+        if compact:
+            # float32约7位有效数字，足够图表显示，序列化更快、响应体更小
+            if ORJSON_AVAILABLE:
+                series = {col: df[col].to_numpy(dtype=np.float32) for col in columns}
+            else:
+                series = {col: df[col].to_numpy(dtype=np.float64).tolist() for col in columns}
+            return ojsonify({
+                'success': True,
+                'format': 'columnar',
+                'klines': {'time': epoch_seconds(df.index), **series},
+                'symbol': symbol,
+                'interval': interval
             })
         
-        return jsonify({
+        # 转换为JSON格式（按列整体转换，避免 iterrows 逐行构造Series）
+        klines = [
+            {'time': t, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+            for t, o, h, l, c, v in zip(
+                epoch_seconds(df.index),
+                *(df[col].to_numpy(dtype=np.float64).tolist() for col in columns)
+            )
+        ]
+        
+        return ojsonify({
             'success': True,
             'klines': klines,
             'symbol': symbol,
@@ -601,7 +760,7 @@ def get_klines():
         
     except Exception as e:
         logger.error(f"获取K线数据API失败: {e}", exc_info=True)
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}), 500
 
 
 @ultra_short_bp.route('/get_price_info', methods=['GET', 'POST'])
@@ -612,12 +771,23 @@ def get_price_info():
         symbol = data.get('symbol', 'BTC')
         
         result = {}
+        entry_timeframes = ['1m', '2m', '3m', '5m']
+        
+        # 行情与各时间框架K线互不依赖，并发获取（I/O等待期间释放GIL）；1h数据只获取一次，供布林带、EMA200和ZigZag共用
+        kline_specs = [(tf, 100) for tf in entry_timeframes] + [('1h', 200), ('1d', 30), ('1w', 10)]
+        max_workers = parse_concurrency(data.get('concurrency'), len(kline_specs))
+        if max_workers is None:
+            return ojsonify({'success': False, 'error': 'concurrency必须是整数'}), 400
+        gate_symbol = strategy._normalize_symbol(symbol)
+        ticker_url = f"{strategy.gate_url}/spot/tickers"
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            ticker_future = executor.submit(strategy.session.get, ticker_url,
+                                            params={'currency_pair': gate_symbol}, timeout=10)
+            klines = strategy.get_klines_batch(symbol, kline_specs, max_workers)
         
         # 1. 获取当前标记价格
         try:
-            gate_symbol = strategy._normalize_symbol(symbol)
-            ticker_url = f"{strategy.gate_url}/spot/tickers"
-            ticker_response = strategy.session.get(ticker_url, params={'currency_pair': gate_symbol}, timeout=10)
+            ticker_response = ticker_future.result()
             if ticker_response.status_code == 200:
                 ticker_data = ticker_response.json()
                 if ticker_data and len(ticker_data) > 0:
@@ -627,69 +797,45 @@ def get_price_info():
             result['current_price'] = None
         
         # 2. 获取1-5min下轨均值（最新值）
-        entry_timeframes = ['1m', '2m', '3m', '5m']
-        bb_lower_values = []
-        for tf in entry_timeframes:
-            df_short = strategy.get_klines(symbol, tf, limit=100)
-            if df_short is not None and not df_short.empty:
-                df_short = strategy.calculate_bollinger_bands(df_short, period=20, std=2)
-                df_short = df_short.dropna()
-                if not df_short.empty:
-                    latest = df_short.iloc[-1]
-                    if pd.notna(latest['bb_lower']):
-                        bb_lower_values.append(float(latest['bb_lower']))
+        short_bands = strategy.latest_bollinger_bands_batch(
+            [klines[(tf, 100)] for tf in entry_timeframes], period=20, std=2)
+        bb_lower_values = short_bands[:, 0][np.isfinite(short_bands).all(axis=1)]
         
-        if bb_lower_values:
-            result['bb_lower_avg'] = round(sum(bb_lower_values) / len(bb_lower_values), 2)
+        if bb_lower_values.size:
+            result['bb_lower_avg'] = round_price(bb_lower_values.mean())
         else:
             result['bb_lower_avg'] = None
         
         # 3. 获取1h布林带（最新值：下轨、中轨、上轨）
-        df_1h = strategy.get_klines(symbol, '1h', limit=200)
-        if df_1h is not None and not df_1h.empty:
-            df_1h = strategy.calculate_bollinger_bands(df_1h, period=20, std=2)
-            df_1h = df_1h.dropna()
-            if not df_1h.empty:
-                latest_1h = df_1h.iloc[-1]
-                result['bb_1h_lower'] = round(float(latest_1h['bb_lower']), 2) if pd.notna(latest_1h['bb_lower']) else None
-                result['bb_1h_middle'] = round(float(latest_1h['bb_middle']), 2) if pd.notna(latest_1h['bb_middle']) else None
-                result['bb_1h_upper'] = round(float(latest_1h['bb_upper']), 2) if pd.notna(latest_1h['bb_upper']) else None
-            else:
-                result['bb_1h_lower'] = None
-                result['bb_1h_middle'] = None
-                result['bb_1h_upper'] = None
+        bands_1h = strategy.latest_bollinger_bands(klines[('1h', 200)], period=20, std=2)
+        if bands_1h is not None:
+            result['bb_1h_lower'], result['bb_1h_middle'], result['bb_1h_upper'] = round_prices(bands_1h)
         else:
             result['bb_1h_lower'] = None
             result['bb_1h_middle'] = None
             result['bb_1h_upper'] = None
         
         # 4. 获取1h EMA200（最新值）
-        df_1h_ema = strategy.get_klines(symbol, '1h', limit=200)
+        df_1h_ema = klines[('1h', 200)]
         if df_1h_ema is not None and not df_1h_ema.empty:
-            df_1h_ema = strategy.calculate_ema(df_1h_ema, [200])
-            df_1h_ema = df_1h_ema.dropna()
-            if not df_1h_ema.empty and 'ema200' in df_1h_ema.columns:
-                latest_ema = df_1h_ema.iloc[-1]
-                result['ema200_1h'] = round(float(latest_ema['ema200']), 2) if pd.notna(latest_ema['ema200']) else None
-            else:
-                result['ema200_1h'] = None
+            # 只需要最新值：标量递推，不生成整条EMA序列
+            ema200 = strategy.ema_last(df_1h_ema['close'].to_numpy(dtype=np.float64), 200)
+            result['ema200_1h'] = round_price(ema200)
         else:
             result['ema200_1h'] = None
         
         # 5. 获取日线高、低点
-        df_1d = strategy.get_klines(symbol, '1d', limit=30)
+        df_1d = klines[('1d', 30)]
         if df_1d is not None and not df_1d.empty:
-            result['daily_high'] = round(float(df_1d['high'].max()), 2)
-            result['daily_low'] = round(float(df_1d['low'].min()), 2)
+            result['daily_high'], result['daily_low'] = round_prices((df_1d['high'].max(), df_1d['low'].min()))
         else:
             result['daily_high'] = None
             result['daily_low'] = None
         
         # 6. 获取周线高、低点
-        df_1w = strategy.get_klines(symbol, '1w', limit=10)
+        df_1w = klines[('1w', 10)]
         if df_1w is not None and not df_1w.empty:
-            result['weekly_high'] = round(float(df_1w['high'].max()), 2)
-            result['weekly_low'] = round(float(df_1w['low'].min()), 2)
+            result['weekly_high'], result['weekly_low'] = round_prices((df_1w['high'].max(), df_1w['low'].min()))
         else:
             result['weekly_high'] = None
             result['weekly_low'] = None
@@ -697,39 +843,11 @@ def get_price_info():
         # 7. 获取买入条件状态
         # 检查ZigZag的1h低点是否越来越高
         zigzag_ascending = False
-        df_1h_zigzag_check = strategy.get_klines(symbol, '1h', limit=200)
+        df_1h_zigzag_check = klines[('1h', 200)]
         if df_1h_zigzag_check is not None and not df_1h_zigzag_check.empty:
-            # 使用pivotlow识别低点
-            zigzag_lows = []
-            depth = 12
-            for i in range(depth, len(df_1h_zigzag_check) - depth):
-                current_low = df_1h_zigzag_check.iloc[i]['low']
-                # 检查是否是pivot low
-                is_pivot = True
-                for j in range(i - depth, i):
-                    if df_1h_zigzag_check.iloc[j]['low'] < current_low:
-                        is_pivot = False
-                        break
-                for j in range(i + 1, i + depth + 1):
-                    if df_1h_zigzag_check.iloc[j]['low'] < current_low:
-                        is_pivot = False
-                        break
-                
-                if is_pivot:
-                    zigzag_lows.append(float(current_low))
-            
-            # 获取最近的低点，判断是否越来越高
-            # 要求：有3个HL最好，最差2个也行
-            if len(zigzag_lows) >= 2:
-                # 如果有3个或更多，取最近3个；如果只有2个，就用这2个
-                recent_lows = zigzag_lows[-3:] if len(zigzag_lows) >= 3 else zigzag_lows[-2:]
-                # 判断是否递增（每个低点都比前一个高）
-                is_ascending = True
-                for i in range(1, len(recent_lows)):
-                    if recent_lows[i] <= recent_lows[i-1]:
-                        is_ascending = False
-                        break
-                zigzag_ascending = is_ascending
+            # 使用pivotlow识别低点，判断最近的低点是否越来越高
+            low_1h = df_1h_zigzag_check['low'].to_numpy(dtype=np.float64)
+            zigzag_ascending = is_zigzag_ascending(low_1h[pivot_low_positions(low_1h)])
         
         # 检查价格是否接近下轨（1-5分钟或1h下轨，满足其一即可）
         # 使用当前价格与下轨比较，价格差绝对值在±0.01%区间内视为满足条件
@@ -760,7 +878,7 @@ def get_price_info():
             'price_near_lower': price_near_lower
         }
         
-        return jsonify({
+        return ojsonify({
             'success': True,
             'data': result,
             'symbol': symbol
@@ -768,7 +886,7 @@ def get_price_info():
         
     except Exception as e:
         logger.error(f"获取价格信息API失败: {e}", exc_info=True)
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}), 500
 
 
 @ultra_short_bp.route('/get_indicators', methods=['GET', 'POST'])
@@ -779,38 +897,38 @@ def get_indicators():
         symbol = data.get('symbol', 'BTC')
         
         result = {}
+        entry_timeframes = ['1m', '2m', '3m', '5m']
+        
+        # 所需K线一次并发获取；1h数据供布林带与ZigZag共用
+        kline_specs = [('1h', 200)] + [(tf, 100) for tf in entry_timeframes] + [('15m', 200)]
+        max_workers = parse_concurrency(data.get('concurrency'), len(kline_specs))
+        if max_workers is None:
+            return ojsonify({'success': False, 'error': 'concurrency必须是整数'}), 400
+        klines = strategy.get_klines_batch(symbol, kline_specs, max_workers)
         
         # 1. 获取1h布林带（只返回下轨）
-        df_1h = strategy.get_klines(symbol, '1h', limit=200)
+        df_1h = klines[('1h', 200)]
         if df_1h is not None and not df_1h.empty:
-            df_1h = strategy.calculate_bollinger_bands(df_1h, period=20, std=2)
+            df_1h = strategy.calculate_bollinger_bands(df_1h.copy(), period=20, std=2)
             df_1h = df_1h.dropna()
             if not df_1h.empty:
-                bb_1h = []
-                for idx, row in df_1h.iterrows():
-                    if pd.notna(row['bb_lower']):
-                        bb_1h.append({
-                            'time': int(idx.timestamp()),
-                            'lower': float(row['bb_lower'])
-                        })
-                result['bb_1h'] = bb_1h
+                result['bb_1h'] = [
+                    {'time': t, 'lower': v}
+                    for t, v in zip(epoch_seconds(df_1h.index), df_1h['bb_lower'].tolist())
+                ]
         
         # 2. 获取1-5min布林带下轨，计算均值
-        entry_timeframes = ['1m', '2m', '3m', '5m']
         bb_lower_means = []
         for tf in entry_timeframes:
-            df_short = strategy.get_klines(symbol, tf, limit=100)
+            df_short = klines[(tf, 100)]
             if df_short is not None and not df_short.empty:
                 df_short = strategy.calculate_bollinger_bands(df_short, period=20, std=2)
                 df_short = df_short.dropna()
                 if not df_short.empty:
-                    bb_lower_data = []
-                    for idx, row in df_short.iterrows():
-                        if pd.notna(row['bb_lower']):
-                            bb_lower_data.append({
-                                'time': int(idx.timestamp()),
-                                'value': float(row['bb_lower'])
-                            })
+                    bb_lower_data = [
+                        {'time': t, 'value': v}
+                        for t, v in zip(epoch_seconds(df_short.index), df_short['bb_lower'].tolist())
+                    ]
                     if bb_lower_data:
                         bb_lower_means.append({
                             'timeframe': tf,
@@ -844,51 +962,31 @@ def get_indicators():
             result['bb_lower_avg'] = bb_lower_avg
         
         # 3. 获取1h ZigZag低点（简化实现，使用pivotlow逻辑，只返回最近3个）
-        df_1h_zigzag = strategy.get_klines(symbol, '1h', limit=200)
+        df_1h_zigzag = klines[('1h', 200)]
         if df_1h_zigzag is not None and not df_1h_zigzag.empty:
-            # 使用pivotlow识别低点
-            zigzag_lows = []
-            depth = 12
-            for i in range(depth, len(df_1h_zigzag) - depth):
-                current_low = df_1h_zigzag.iloc[i]['low']
-                # 检查是否是pivot low
-                is_pivot = True
-                for j in range(i - depth, i):
-                    if df_1h_zigzag.iloc[j]['low'] < current_low:
-                        is_pivot = False
-                        break
-                for j in range(i + 1, i + depth + 1):
-                    if df_1h_zigzag.iloc[j]['low'] < current_low:
-                        is_pivot = False
-                        break
-                
-                if is_pivot:
-                    idx = df_1h_zigzag.index[i]
-                    zigzag_lows.append({
-                        'time': int(idx.timestamp()),
-                        'value': float(current_low)
-                    })
-            # 只返回最近3个低点
-            zigzag_lows = sorted(zigzag_lows, key=lambda x: x['time'], reverse=True)[:3]
-            result['zigzag_lows_1h'] = zigzag_lows
+            # 使用pivotlow识别低点，只返回最近3个（时间倒序）
+            low_1h = df_1h_zigzag['low'].to_numpy(dtype=np.float64)
+            positions = pivot_low_positions(low_1h)[::-1][:3]
+            result['zigzag_lows_1h'] = [
+                {'time': t, 'value': v}
+                for t, v in zip(epoch_seconds(df_1h_zigzag.index[positions]), low_1h[positions].tolist())
+            ]
         
         # 4. 获取15分钟Vegas通道（EMA 12和EMA 169）
-        df_15m = strategy.get_klines(symbol, '15m', limit=200)
+        df_15m = klines[('15m', 200)]
         if df_15m is not None and not df_15m.empty:
-            df_15m = strategy.calculate_ema(df_15m, [12, 169])
-            df_15m = df_15m.dropna()
-            if not df_15m.empty:
-                vegas_15m = []
-                for idx, row in df_15m.iterrows():
-                    if pd.notna(row.get('ema12')) and pd.notna(row.get('ema169')):
-                        vegas_15m.append({
-                            'time': int(idx.timestamp()),
-                            'ema12': float(row['ema12']),
-                            'ema169': float(row['ema169'])
-                        })
-                result['vegas_15m'] = vegas_15m
+            close_15m = df_15m['close'].to_numpy(dtype=np.float64)
+            ema12 = strategy.ema_values(close_15m, 12)
+            ema169 = strategy.ema_values(close_15m, 169)
+            valid = np.isfinite(ema12) & np.isfinite(ema169)
+            if valid.any():
+                result['vegas_15m'] = [
+                    {'time': t, 'ema12': e12, 'ema169': e169}
+                    for t, e12, e169 in zip(epoch_seconds(df_15m.index[valid]),
+                                            ema12[valid].tolist(), ema169[valid].tolist())
+                ]
         
-        return jsonify({
+        return ojsonify({
             'success': True,
             'indicators': result,
             'symbol': symbol
@@ -896,7 +994,7 @@ def get_indicators():
         
     except Exception as e:
         logger.error(f"获取指标数据API失败: {e}", exc_info=True)
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}), 500
 
 
 @ultra_short_bp.route('/get_support_levels', methods=['GET', 'POST'])
@@ -908,7 +1006,7 @@ def get_support_levels():
         
         support_levels = strategy.find_support_levels(symbol)
         
-        return jsonify({
+        return ojsonify({
             'success': True,
             'support_levels': support_levels,
             'symbol': symbol
@@ -916,7 +1014,21 @@ def get_support_levels():
         
     except Exception as e:
         logger.error(f"获取支撑位API失败: {e}", exc_info=True)
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}), 500
+
+
+@ultra_short_bp.route('/clear_cache', methods=['POST'])
+def clear_cache():
+    """清除K线缓存"""
+    try:
+        strategy.clear_kline_cache()
+        return ojsonify({
+            'success': True,
+            'message': 'K线缓存已清除'
+        })
+    except Exception as e:
+        logger.error(f"清除K线缓存失败: {e}")
+        return ojsonify({'success': False, 'error': str(e)}), 500
 
 
 @ultra_short_bp.route('/get_active_signals', methods=['GET'])
@@ -929,14 +1041,14 @@ def get_active_signals():
         
         # 获取活跃信号
         signals = strategy.get_active_signals()
-        return jsonify({
+        return ojsonify({
             'success': True,
             'signals': signals,
             'count': len(signals)
         })
     except Exception as e:
         logger.error(f"获取活跃信号API失败: {e}", exc_info=True)
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}), 500
 
 
 @ultra_short_bp.route('/update_signal_status', methods=['GET', 'POST'])
@@ -948,13 +1060,13 @@ def update_signal_status():
         
         updated_count = strategy.update_signal_status(symbol)
         
-        return jsonify({
+        return ojsonify({
             'success': True,
             'updated_count': updated_count
         })
     except Exception as e:
         logger.error(f"更新信号状态API失败: {e}", exc_info=True)
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}), 500
 
 
 @ultra_short_bp.route('/get_history_signals', methods=['GET'])
@@ -963,14 +1075,14 @@ def get_history_signals():
     try:
         limit = request.args.get('limit', 50, type=int)
         signals = strategy.get_history_signals(limit)
-        return jsonify({
+        return ojsonify({
             'success': True,
             'signals': signals,
             'count': len(signals)
         })
     except Exception as e:
         logger.error(f"获取历史信号API失败: {e}", exc_info=True)
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}), 500
 
 
 @ultra_short_bp.route('/get_recent_5m_signals', methods=['GET', 'POST'])
@@ -1013,18 +1125,18 @@ def get_recent_5m_signals():
             
             conn.close()
             
-            return jsonify({
+            return ojsonify({
                 'success': True,
                 'signals': signals,
                 'count': len(signals)
             })
         except Exception as e:
             logger.error(f"获取最近5分钟信号失败: {e}", exc_info=True)
-            return jsonify({'success': False, 'error': str(e)}), 500
+            return ojsonify({'success': False, 'error': str(e)}), 500
         
     except Exception as e:
         logger.error(f"获取最近5分钟信号API失败: {e}", exc_info=True)
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}), 500
 
 
 
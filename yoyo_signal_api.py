@@ -542,6 +542,14 @@ def _get_recent_1h_signals(symbol: str, hours: int, limit: int) -> Tuple[Optiona
     }, None
 
 
+def _latest_yoyo_signals(symbol: str, timeframe: str, limit: int) -> Tuple[Optional[List[Dict[str, object]]], float]:
+    df = _get_gate_klines(symbol, SUPPORTED_TIMEFRAMES[timeframe], limit)
+    if df is None or df.empty:
+        return None, 0.0
+    signals_payload = _compute_yoyo_signals(df)
+    return signals_payload['latest'], float(df['close'].iloc[-1])
+
+
 def scan_yoyo_symbols(
     symbols: List[str],
     timeframes: Optional[List[str]] = None,
@@ -575,32 +583,39 @@ def scan_yoyo_symbols(
     sent = []
     errors = []
 
-    for symbol in normalized_symbols:
-        for timeframe in valid_timeframes:
-            df = _get_gate_klines(symbol, SUPPORTED_TIMEFRAMES[timeframe], limit)
-            if df is None or df.empty:
-                errors.append({'symbol': symbol, 'timeframe': timeframe, 'error': 'No kline data'})
-                continue
-            signals_payload = _compute_yoyo_signals(df)
-            latest_signals = signals_payload['latest']
-            if not latest_signals:
-                continue
-            last_close = float(df['close'].iloc[-1])
-            did_send = _maybe_send_latest_signal(
-                symbol,
-                timeframe,
-                latest_signals,
-                last_close,
-                last_state=last_state,
-                persist=False
-            )
-            if did_send:
-                sent.append({
-                    'symbol': symbol,
-                    'timeframe': timeframe,
-                    'signals': [s.get('signal') for s in latest_signals],
-                    'time': latest_signals[0].get('time')
-                })
+    # K线获取与信号计算是网络I/O密集型，各(币种, 周期)并发执行；
+    # 推送与状态更新仍按原顺序串行处理
+    pairs = [(symbol, timeframe) for symbol in normalized_symbols for timeframe in valid_timeframes]
+    max_workers = min(8, max(1, len(pairs)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        computed = list(executor.map(
+            _latest_yoyo_signals,
+            [symbol for symbol, _ in pairs],
+            [timeframe for _, timeframe in pairs],
+            [limit] * len(pairs)
+        ))
+
+    for (symbol, timeframe), (latest_signals, last_close) in zip(pairs, computed):
+        if latest_signals is None:
+            errors.append({'symbol': symbol, 'timeframe': timeframe, 'error': 'No kline data'})
+            continue
+        if not latest_signals:
+            continue
+        did_send = _maybe_send_latest_signal(
+            symbol,
+            timeframe,
+            latest_signals,
+            last_close,
+            last_state=last_state,
+            persist=False
+        )
+        if did_send:
+            sent.append({
+                'symbol': symbol,
+                'timeframe': timeframe,
+                'signals': [s.get('signal') for s in latest_signals],
+                'time': latest_signals[0].get('time')
+            })
 
     _save_last_signals(last_state)
 